@@ -1,17 +1,88 @@
-import argparse, io, json
+import argparse, hashlib, io, json, os
 import numpy as np
 import pandas as pd
 import boto3
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from scipy.stats import lognorm
 
-s3 = boto3.client("s3")
-
-
-def write_csv_s3(df, bucket, key):
-    s3.put_object(Bucket=bucket, Key=key, Body=df.to_csv(index=False).encode("utf-8"))
+from lognorm_bootstrap import moments_lognorm_ci, threshold_ci
+from baseline_store import BaselineStore
+from asof_align import align_asof
+from storage import open_storage
+
+INPUT_WORKERS = 8
+
+
+def write_csv(storage, df, key):
+    storage.put(key, df.to_csv(index=False).encode("utf-8"), content_type="text/csv")
+
+def write_partitions(storage, df, base, run_id):
+    """Append ``df`` as <base>/month=YYYY-MM/part-<run_id>.csv objects; returns the keys written."""
+    parts = {f"{base}/month={ym}/part-{run_id}.csv": part.to_csv(index=False).encode("utf-8")
+             for ym, part in df.groupby(df["Date"].dt.strftime("%Y-%m"))}
+    return storage.put_many(parts)
+
+def read_text(storage, key):
+    try:
+        return storage.get(key).decode("utf-8")
+    except KeyError:
+        return None
+
+def split_s3_uri(uri):
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+def open_cache(location):
+    """(storage, key prefix) for --input_cache: "s3://bucket/prefix/" or a local directory."""
+    if location.startswith("s3://"):
+        b, k = split_s3_uri(location)
+        return open_storage(b), k.rstrip("/") + "/"
+    local = location.startswith(("/", ".", "\\", "file://")) or location[1:2] == ":"     # incl. C:\...
+    return open_storage(location if local else "./" + location), ""
+
+# ---- parsed-input cache: <cache>/<csv stem>.parquet tagged with the source ETag ----
+def _cache_load(cache, stem, etag):
+    cstore, cprefix = cache
+    key = f"{cprefix}{stem}.parquet"
+    h = cstore.head(key)
+    if h is None or h["metadata"].get("source-etag") != etag:
+        return None
+    return pd.read_parquet(io.BytesIO(cstore.get(key)))
+
+def _cache_store(cache, stem, etag, df):
+    try:
+        buf = io.BytesIO()
+        df.to_parquet(buf, index=False)
+    except Exception as e:            # no pyarrow / mixed-type columns -> just skip caching
+        print(f"input cache skipped for {stem}: {e}")
+        return
+    cstore, cprefix = cache
+    cstore.put(f"{cprefix}{stem}.parquet", buf.getvalue(), metadata={"source-etag": etag})
+
+def read_csv_cached(storage, key, cache=None):
+    """CSV object ``key`` as a frame; reuses the cached parse while the object's ETag is unchanged."""
+    stem = os.path.splitext(os.path.basename(key))[0]
+    if not cache:
+        return pd.read_csv(io.BytesIO(storage.get(key)))
+    h = storage.head(key)
+    if h is None:
+        raise FileNotFoundError(storage.url(key))
+    df = _cache_load(cache, stem, h["etag"])
+    if df is not None:
+        print(f"  cached: {storage.url(key)} (etag {h['etag']})")
+        return df
+    df = pd.read_csv(io.BytesIO(storage.get(key)))
+    _cache_store(cache, stem, h["etag"], df)
+    return df
+
+def read_inputs(storage, keys, cache=None, workers=INPUT_WORKERS):
+    """Fetch and parse all inputs concurrently; ``keys`` is {name: object key}."""
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(keys)))) as ex:
+        futs = {name: ex.submit(read_csv_cached, storage, key, cache) for name, key in keys.items()}
+        return {name: f.result() for name, f in futs.items()}
 
 def get_col(df, names):
     for n in names:
@@ -48,6 +119,102 @@ def compute_threshold_from_lognorm(delta_series):
     return p99, "lognormal_99"
 
 
+def prep_landsat(landsat):
+    landsat["Date"] = pdt(landsat[get_col(landsat, ["Landsat acquisition date","Landsat_8_acquisition_date"])])
+    landsat["DeltaT_Landsat"]   = pd.to_numeric(landsat[get_col(landsat, ["Max Temp","Max_Temp"])], errors="coerce") \
+                                - pd.to_numeric(landsat[get_col(landsat, ["Mean Temp","Mean_Temp"])], errors="coerce")
+    return landsat
+
+def _md5(b):
+    return hashlib.md5(b).hexdigest()
+
+def read_csv_increment(storage, key, src):
+    """(frame, appended, source record) for the CSV at ``key`` against the record of the last run.
+
+    Unchanged ETag: frame is None and nothing is fetched. Otherwise the object is fetched once; when the
+    header line and the MD5 of the first ``src["size"]`` bytes both match, only the appended rows are parsed.
+    Any rewrite (recomputed earlier rows, new columns, reordering) fails a check and forces a full re-read.
+    """
+    h = storage.head(key)
+    if h is None:
+        raise FileNotFoundError(storage.url(key))
+    if src and src["etag"] == h["etag"]:
+        return None, True, src
+    data = storage.get(key)
+    header = data.split(b"\n", 1)[0].decode("utf-8") + "\n"
+    rec = {"etag": h["etag"], "size": len(data), "header": header, "md5": _md5(data)}
+    if (src and src.get("md5") and len(data) > src["size"] and header == src["header"]
+            and data[src["size"] - 1:src["size"]] == b"\n" and _md5(data[:src["size"]]) == src["md5"]):
+        return pd.read_csv(io.BytesIO(header.encode("utf-8") + data[src["size"]:])), True, rec
+    return pd.read_csv(io.BytesIO(data)), False, rec
+
+def load_store(storage, key):
+    try:
+        return BaselineStore.from_json(read_text(storage, key))
+    except ValueError as e:           # sketch config changed -> refold the full history
+        print(f"{e}; rebuilding")
+        return BaselineStore()
+
+def update_store(storage, store, key, site):
+    """Fold new Landsat ΔT rows into ``store``; returns (rows added, appended-only)."""
+    src = store.sources.get(key) if store.dates.get((site, "landsat")) else None
+    df, appended, rec = read_csv_increment(storage, key, src)
+    if df is None:
+        return 0, True
+    df = prep_landsat(df)
+    if not appended:
+        store.drop(site, "landsat")   # rewritten (or first run): rebuild the series from the whole file
+    added = store.add_frame(df, site, "landsat", "Date", "DeltaT_Landsat", only_new=False)
+    store.dates.setdefault((site, "landsat"), set()).update(df["Date"].dropna().dt.strftime("%Y-%m-%d"))
+    store.sources[key] = rec
+    return added, appended
+
+
+def threshold_version(threshold, method):
+    # id of a frozen scoring threshold; only re-frozen when the fitted value moves past --threshold_tolerance
+    return hashlib.sha1(f"{method}:{threshold:.6f}".encode()).hexdigest()[:12]
+
+def frozen_threshold(state, threshold, method, tolerance):
+    """(threshold, version, reused) for an incremental run: keep the state's threshold while the method is
+    the same and the newly fitted value is within ``tolerance`` °C of it (exactly equal for overrides)."""
+    old = state.get("threshold_deltaT_celsius")
+    if state.get("threshold_version") and state.get("method") == method and old is not None:
+        if abs(threshold - old) <= (0.0 if method == "override" else tolerance):
+            return float(old), state["threshold_version"], True
+    return threshold, threshold_version(threshold, method), False
+
+# scene id columns per sensor (first one present), combined with the observation date
+SCENE_ID_COLS = {"GEE": ["Sentinel Image ID", "Sentinel_Image_ID"], "Constellr": ["Filename"],
+                 "Fusion": ["SourceFile", "SourceKey"]}
+DELTA_COLS = {"GEE": "DeltaT_GEE", "Constellr": "DeltaT_Constellr", "Fusion": "DeltaT_Fusion"}
+
+def scene_keys(df, sensor):
+    key = pd.to_datetime(df["Date"], errors="coerce").dt.strftime("%Y-%m-%dT%H:%M:%S")
+    for c in SCENE_ID_COLS[sensor]:
+        if c in df.columns:
+            return sensor + ":" + df[c].astype(str) + "@" + key
+    return sensor + ":" + key
+
+def new_scene_mask(df, seen):
+    """Rows holding at least one ``<sensor>_scene`` not in ``seen``."""
+    mask = pd.Series(False, index=df.index)
+    for s in DELTA_COLS:
+        c = f"{s}_scene"
+        if c in df.columns:
+            mask |= df[c].notna() & ~df[c].isin(seen)
+    return mask
+
+def exceeding_scenes(df, threshold):
+    """{row index: scene ids whose ΔT is above ``threshold``}."""
+    out = {}
+    for s, dcol in DELTA_COLS.items():
+        if dcol in df.columns and f"{s}_scene" in df.columns:
+            hit = pd.to_numeric(df[dcol], errors="coerce") > threshold
+            for i, k in df.loc[hit, f"{s}_scene"].items():
+                out.setdefault(i, []).append(k)
+    return out
+
+
 def send_anomaly_email_via_ses(df_anom, location, threshold, from_addr, to_addrs, ses_region):
 
 
@@ -158,8 +325,21 @@ def main():
 
     ap.add_argument("--s3_bucket", required=True)
     ap.add_argument("--s3_prefix", required=True)         
+    ap.add_argument("--fusion_site", default="zaporizhia")   # as in the fusion job: lst-fusion_<site>_<year>_metadata_summary.csv
+    ap.add_argument("--fusion_year", default=None)           # default: --downscaled_year
+    ap.add_argument("--fusion_key", default=None)            # explicit summary key, overrides site/year
     ap.add_argument("--out_prefix", required=True)        
     ap.add_argument("--override_threshold", default=None) 
+    ap.add_argument("--n_boot", type=int, default=100000)   # bootstrap resamples for the threshold CI
+    ap.add_argument("--boot_seed", type=int, default=None)
+    ap.add_argument("--full_baseline", action="store_true", default=False)  # threshold + CI from the full Landsat CSV, no baseline store
+    ap.add_argument("--incremental_baseline", action="store_true")          # the default now; kept for old job configs
+    ap.add_argument("--input_cache", default=None)   # opt-in parsed-input cache: s3://bucket/prefix/ or a local dir (keep it outside out_prefix)
+    ap.add_argument("--storage", default=None)       # storage root override, e.g. file:///tmp/standin (default: the bucket)
+    ap.add_argument("--input_workers", type=int, default=INPUT_WORKERS)
+    ap.add_argument("--tolerance_days", type=float, default=1.0)   # as-of alignment window across sensors
+    ap.add_argument("--incremental", action="store_true", default=False)  # score only rows with scenes not processed before
+    ap.add_argument("--threshold_tolerance", type=float, default=0.5)     # °C the fitted threshold may drift before a rescore
 
 
     args, _ = ap.parse_known_args()
@@ -171,12 +351,15 @@ def main():
     nyear      = str(args.normal_year).strip()
     dyear      = str(args.downscaled_year).strip()
 
-    # 
-    landsat_uri = f"s3://{bucket}/{prefix}/{location}/{location}_stats_normal_{nyear}_merged.csv"
-    down_uri    = f"s3://{bucket}/{prefix}/{location}/{location}_stats_downscale_{dyear}_merged.csv"
-    const_uri   =  f"s3://{bucket}/{prefix}/{location}/{location}_LST_summary.csv"
+    storage = open_storage(args.storage or bucket, max_workers=args.input_workers)
 
-    fusion_uri =f"s3://{bucket}/{prefix}/{location}/lst-fusion_zaporizhia_2024_metadata_summary.csv"
+    # 
+    landsat_key = f"{prefix}/{location}/{location}_stats_normal_{nyear}_merged.csv"
+    down_key    = f"{prefix}/{location}/{location}_stats_downscale_{dyear}_merged.csv"
+    const_key   = f"{prefix}/{location}/{location}_LST_summary.csv"
+    fyear       = str(args.fusion_year or dyear).strip()
+    fusion_key  = args.fusion_key or f"{prefix}/{location}/lst-fusion_{args.fusion_site}_{fyear}_metadata_summary.csv"
+    landsat_uri, down_uri, const_uri, fusion_uri = map(storage.url, (landsat_key, down_key, const_key, fusion_key))
 
 
     print("Reading:")
@@ -185,14 +368,16 @@ def main():
     print(" ", const_uri)
     print(" ", fusion_uri)
 
-    # 
-    landsat = pd.read_csv(landsat_uri)
-    down    = pd.read_csv(down_uri)
-    const   = pd.read_csv(const_uri)
-    fusion  = pd.read_csv(fusion_uri)
+    # inputs fetched + parsed concurrently; with --input_cache, unchanged objects come from the ETag cache
+    cache = open_cache(args.input_cache) if args.input_cache and args.input_cache.lower() != "none" else None
+    # (Landsat is only parsed in full with --full_baseline; otherwise the baseline store folds in appended rows)
+    keys = {"down": down_key, "const": const_key, "fusion": fusion_key}
+    if args.full_baseline:
+        keys["landsat"] = landsat_key
+    frames  = read_inputs(storage, keys, cache=cache, workers=args.input_workers)
+    down, const, fusion = frames["down"], frames["const"], frames["fusion"]
 
     # 
-    landsat["Date"] = pdt(landsat[get_col(landsat, ["Landsat acquisition date","Landsat_8_acquisition_date"])])
     down["Date"]    = pdt(down[get_col(down, ["Sentinel 2 acquisition date","Sentinel_2_acquisition_date"])])
     # Constellr "Date Folder" sometimes saved as YYYY-MM-DD or DD-MM-YYYY
     d1 = pdt(const[get_col(const, ["Date Folder"])], format="%Y-%m-%d")
@@ -202,8 +387,6 @@ def main():
     fusion["Date"] = pdt(fusion["Date"], utc=True).dt.tz_convert(None)
 
     # ΔT columns
-    landsat["DeltaT_Landsat"]   = pd.to_numeric(landsat[get_col(landsat, ["Max Temp","Max_Temp"])], errors="coerce") \
-                                - pd.to_numeric(landsat[get_col(landsat, ["Mean Temp","Mean_Temp"])], errors="coerce")
     down["DeltaT_GEE"]          = pd.to_numeric(down[get_col(down, ["Max Temp","Max_Temp"])], errors="coerce") \
                                 - pd.to_numeric(down[get_col(down, ["Mean Temp","Mean_Temp"])], errors="coerce")
     const["DeltaT_Constellr"]   = pd.to_numeric(const[get_col(const, ["Max Temp"])], errors="coerce") \
@@ -220,30 +403,43 @@ def main():
         down["L8_Date_for_S2"] = pd.NaT
     down["S2_L8_days_diff"] = (down["Date"] - down["L8_Date_for_S2"]).dt.total_seconds() / 86400.0
 
-    landsat_subset = landsat[["Date"]]
     keep_ids = [c for c in ["Landsat Image ID","Sentinel Image ID",
                             "Landsat_Image_ID","Sentinel_Image_ID"] if c in down.columns]
     down_subset    = down[["Date","DeltaT_GEE","L8_Date_for_S2","S2_L8_days_diff", *keep_ids]]
     const_subset   = const[["Date","DeltaT_Constellr"]]
     fusion_subset  = fusion[["Date","DeltaT_Fusion"]]
-
-    df = (landsat_subset
-            .merge(down_subset,   on="Date", how="outer")
-            .merge(const_subset,  on="Date", how="outer")
-            .merge(fusion_subset, on="Date", how="outer")
-            .sort_values("Date").reset_index(drop=True))
+    if args.incremental:
+        # scene ids ride through the alignment so processed/alerted scenes can be tracked across runs
+        down_subset   = down_subset.assign(GEE_scene=scene_keys(down, "GEE"))
+        const_subset  = const_subset.assign(Constellr_scene=scene_keys(const, "Constellr"))
+        fusion_subset = fusion_subset.assign(Fusion_scene=scene_keys(fusion, "Fusion"))
 
     
-    desired = ["Date","DeltaT_GEE","DeltaT_Constellr","DeltaT_Fusion",
-               "L8_Date_for_S2","S2_L8_days_diff","Landsat Image ID","Sentinel Image ID",
-               "Landsat_Image_ID","Sentinel_Image_ID"]
-    df = df[[c for c in desired if c in df.columns]]
+    # Landsat baseline: the store holds ΔT moments/sketch + observation dates; only appended rows are parsed
+    store_key = out_prefix + "baseline_store.json"
+    store, landsat = None, None
+    if args.full_baseline:
+        landsat = prep_landsat(frames["landsat"])
+        landsat_dates = landsat["Date"]
+        n_base = int(landsat["DeltaT_Landsat"].notna().sum())
+    else:
+        store = load_store(storage, store_key)
+        added, appended = update_store(storage, store, landsat_key, location)
+        landsat_dates = store.observation_dates(location, "landsat")
+        n_base = store.summary(location, "landsat")["n"]
+        print(f"Baseline store: +{added} Landsat rows ({'appended' if appended else 'full read'}, "
+              f"last={store.last_date.get((location, 'landsat'))})")
+    landsat_subset = pd.DataFrame({"Date": landsat_dates})
 
-    
     if args.override_threshold is not None:
         threshold = float(args.override_threshold)
         method = "override"
+    elif store is not None and np.isfinite(store.lognorm_threshold(location, "landsat", q=0.99)[0]):
+        threshold, method = store.lognorm_threshold(location, "landsat", q=0.99)[0], "lognormal_99"
     else:
+        if landsat is None:
+            # too few positive ΔT for the lognormal fit: exact fallback on the raw rows (small by definition)
+            landsat = prep_landsat(read_csv_cached(storage, landsat_key, cache))
         threshold, method = compute_threshold_from_lognorm(landsat["DeltaT_Landsat"])
         if not np.isfinite(threshold):
             
@@ -251,12 +447,60 @@ def main():
             threshold = float(np.nanpercentile(x[np.isfinite(x)], 99)) if x.notna().any() else np.nan
             method = "empirical_99"
 
-    print(f"\nBaseline ΔT count (non-NaN): {landsat['DeltaT_Landsat'].notna().sum()}")
+    print(f"\nBaseline ΔT count (non-NaN): {n_base}")
+    if landsat is not None:
+        ci_low, ci_high = threshold_ci(landsat["DeltaT_Landsat"], method=method,
+                                       n_boot=args.n_boot, seed=args.boot_seed)
+    elif method == "lognormal_99":
+        # parametric CI from the stored log-moments instead of resampling the raw history
+        s = store.summary(location, "landsat")
+        ci_low, ci_high = moments_lognorm_ci(s["log_mu"], s["log_sigma"], s["n_pos"],
+                                             n_boot=args.n_boot, seed=args.boot_seed)
+    else:
+        ci_low, ci_high = np.nan, np.nan
     print(f"Threshold (ΔT) = {threshold:.4f} °C  | method={method}")
+    if np.isfinite(ci_low):
+        print(f"95% bootstrap CI: {ci_low:.4f} – {ci_high:.4f} °C  (B={args.n_boot})")
+
+    # Incremental mode: the scoring threshold is frozen per version; processed and alerted scene ids live in
+    # the state, so late-arriving rows are still scored and no anomaly is mailed twice
+    state_key = out_prefix + "anomaly_state.json"
+    fitted = threshold
+    version = threshold_version(threshold, method)
+    processed, alerted = set(), set()
+    if args.incremental:
+        state = json.loads(read_text(storage, state_key) or "{}")
+        threshold, version, reused = frozen_threshold(state, fitted, method, args.threshold_tolerance)
+        alerted = set(state.get("alerted", []))
+        if reused:
+            processed = set(state.get("processed", []))
+            print(f"Incremental: threshold version {version} ({threshold:.4f} °C, fitted {fitted:.4f}); "
+                  f"{len(processed)} scenes already processed")
+        else:
+            print(f"Incremental: new threshold version {version} ({threshold:.4f} °C) -> scoring all rows")
+
+    # one row per observation event: nearest scene of each sensor within the tolerance (S2 date anchors)
+    df = align_asof({"GEE": down_subset, "Constellr": const_subset,
+                     "Fusion": fusion_subset, "Landsat": landsat_subset}, tolerance_days=args.tolerance_days)
+    if args.incremental:
+        df = df[new_scene_mask(df, processed)].reset_index(drop=True)
+
+    
+    desired = ["Date","DeltaT_GEE","DeltaT_Constellr","DeltaT_Fusion",
+               "L8_Date_for_S2","S2_L8_days_diff","Landsat Image ID","Sentinel Image ID",
+               "Landsat_Image_ID","Sentinel_Image_ID",
+               "GEE_gap_days","Constellr_gap_days","Fusion_gap_days","Landsat_gap_days",
+               "GEE_scene","Constellr_scene","Fusion_scene"]
+    df = df[[c for c in desired if c in df.columns]]
 
    
-    all_key  = out_prefix + "All_Anomalies_Comparison_WithFusion.csv"
-    write_csv_s3(df, bucket, all_key)
+    run_id = pd.Timestamp.now(tz="UTC").strftime("%Y%m%dT%H%M%S")
+    if args.incremental:
+        all_key = out_prefix + f"All_Anomalies_Comparison_WithFusion/threshold={version}"
+        written = write_partitions(storage, df, all_key, run_id)
+    else:
+        all_key  = out_prefix + "All_Anomalies_Comparison_WithFusion.csv"
+        write_csv(storage, df, all_key)
 
     
     conds = []
@@ -275,21 +519,41 @@ def main():
         mask = pd.Series(False, index=df.index)
 
     df_anom = df.loc[mask].sort_values("Date").reset_index(drop=True)
-
-    anom_key = out_prefix + "Only_Anomalies_Validated_WithFusion.csv"
-    write_csv_s3(df_anom, bucket, anom_key)
+    df_alert = df_anom
+    if args.incremental:
+        # alert only on rows with an above-threshold scene that was never alerted (under any version)
+        hits = exceeding_scenes(df_anom, threshold)
+        df_alert = df_anom.loc[[i for i, ks in hits.items() if not alerted.issuperset(ks)]].sort_index()
+        alerted.update(k for ks in hits.values() for k in ks)
+        for s in DELTA_COLS:
+            if f"{s}_scene" in df.columns:
+                processed.update(df[f"{s}_scene"].dropna())
+
+    if args.incremental:
+        anom_key = out_prefix + f"Only_Anomalies_Validated_WithFusion/threshold={version}"
+        written += write_partitions(storage, df_anom, anom_key, run_id)
+    else:
+        anom_key = out_prefix + "Only_Anomalies_Validated_WithFusion.csv"
+        write_csv(storage, df_anom, anom_key)
 
     
     print(f"\nRows in full merged: {len(df)}")
     print(f"Rows flagged as anomalies: {len(df_anom)}")
+    if args.incremental:
+        print(f"New anomalies to alert: {len(df_alert)}")
 
     
     thr_key = out_prefix + "threshold_99p.json"
-    s3.put_object(
-        Bucket=bucket, Key=thr_key,
-        Body=json.dumps({
+    storage.put(
+        thr_key,
+        json.dumps({
             "threshold_deltaT_celsius": threshold,
+            "threshold_fitted_celsius": fitted,
             "method": method,
+            "threshold_version": version,
+            "threshold_ci95_celsius": [ci_low, ci_high] if np.isfinite(ci_low) else None,
+            "bootstrap": {"n_boot": args.n_boot, "ci": 0.95, "seed": args.boot_seed,
+                          "from": "landsat_history" if landsat is not None else "baseline_store"},
             "inputs": {
                 "landsat_uri": landsat_uri,
                 "downscaled_uri": down_uri,
@@ -298,20 +562,50 @@ def main():
             },
             "outputs": {"all": all_key, "anomalies": anom_key}
         }, indent=2).encode("utf-8"),
-        ContentType="application/json"
+        content_type="application/json"
     )
 
+    if args.incremental:
+        last = df["Date"].max() if len(df) else pd.NaT
+        last = state.get("last_scored_date") if pd.isna(last) else last.strftime("%Y-%m-%d")
+        storage.put(
+            state_key,
+            json.dumps({
+                "last_scored_date": last,          # informational; resuming uses the scene ids below
+                "threshold_version": version,
+                "threshold_deltaT_celsius": threshold,
+                "threshold_fitted_celsius": fitted,
+                "method": method,
+                "run_id": run_id,
+                "rows_scored": int(len(df)),
+                "anomalies": int(len(df_anom)),
+                "new_alerts": int(len(df_alert)),
+                "processed": sorted(processed),
+                "alerted": sorted(alerted),
+            }, indent=1).encode("utf-8"),
+            content_type="application/json"
+        )
+
+    if store is not None:
+        storage.put(store_key, store.to_json().encode("utf-8"), content_type="application/json")
+
     print("\nWrote:")
-    print(f" - s3://{bucket}/{all_key}")
-    print(f" - s3://{bucket}/{anom_key}")
-    print(f" - s3://{bucket}/{thr_key}")
+    for k in (written if args.incremental else [all_key, anom_key]):
+        print(f" - {storage.url(k)}")
+    print(f" - {storage.url(thr_key)}")
+    if args.incremental:
+        print(f" - {storage.url(state_key)}")
+    if store is not None:
+        print(f" - {storage.url(store_key)}")
+    print(f"Storage: {storage.report()}")
     
         
-    if args.send_email and args.email_from and args.email_to:
+    # incremental runs only alert on anomalies that were not alerted before
+    if args.send_email and args.email_from and args.email_to and (len(df_alert) or not args.incremental):
         to_list = [e.strip() for e in args.email_to.split(",") if e.strip()]
         try:
             send_anomaly_email_via_ses(
-                df_anom=df_anom,
+                df_anom=df_alert,
                 location=location,
                 threshold=threshold,
                 from_addr=args.email_from,
@@ -1,5 +1,9 @@
-import argparse, os, boto3, json,io
+import argparse, json, io
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from storage import open_storage
+from manifest import Manifest, manifest_key_for
 
 full = argparse.ArgumentParser()
 full.add_argument("--gee_secret_name", required=True)
@@ -11,6 +15,11 @@ full.add_argument("--end_date", required=True)
 full.add_argument("--year", required=True)
 full.add_argument("--s3_bucket", required=True)
 full.add_argument("--s3_prefix", default="lst")
+full.add_argument("--storage", default=None)   # e.g. file:///tmp/standin to run against a local tree
+full.add_argument("--full_refresh", action="store_true")   # ignore the ETag manifest and reparse everything
+full.add_argument("--fusion_site", default="zaporizhia")   # Constellr_FusionLST/lst-fusion_<site>_<year>/
+full.add_argument("--fusion_prefix", default=None)         # explicit prefix, overrides site/year
+full.add_argument("--json_workers", type=int, default=16)  # concurrent metadata GETs
 args, _ = full.parse_known_args()
 
 lat=args.lat
@@ -23,66 +32,123 @@ s3_bucket=args.s3_bucket
 s3_prefix=args.s3_prefix
 
 BUCKET = s3_bucket
-PREFIX = "Constellr_FusionLST/lst-fusion_zaporizhia_2024/"  
-OUT_CSV = "lst-fusion_zaporizhia_2024_metadata_summary.csv"
+PREFIX = args.fusion_prefix or f"Constellr_FusionLST/lst-fusion_{args.fusion_site}_{year}/"
+STEM = f"{PREFIX.rstrip('/').split('/')[-1]}_metadata_summary"     # e.g. lst-fusion_zaporizhia_2024_metadata_summary
 NEEDLE = "metadata"   
 
+# typed summary schema; SourceKey identifies the row for upserts (dropped from the CSV)
+COLUMNS = {"Date": None, "lst_min": "float64", "lst_max": "float64", "lst_mean": "float64",
+           "std_min": "float64", "std_max": "float64", "std_mean": "float64",
+           "SourceFile": "string", "SourceKey": "string"}
 
-s3 = boto3.client("s3")
+try:
+    import orjson
+except Exception:
+    orjson = None
 
-def iter_keys(bucket, prefix):
-    
-    pag = s3.get_paginator("list_objects_v2")
-    for page in pag.paginate(Bucket=bucket, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            yield obj["Key"]
+def json_loads(b):
+    # orjson parses bytes directly and is several times faster, but rejects the NaN tokens some
+    # metadata files carry; those fall back to the stdlib parser, which accepts them
+    if orjson is not None:
+        try:
+            return orjson.loads(b)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(b.decode("utf-8"))
+
+
+store = open_storage(args.storage or BUCKET, max_workers=args.json_workers)
+
+def iter_objects(prefix):
+    # listing entries (key, size, etag) of the metadata JSONs
+    for obj in store.list(prefix):
+        fname = obj["key"].split("/")[-1]
+        if fname.endswith(".json") and NEEDLE.lower() in fname.lower():
+            yield obj
+
+def k2c(v):
+    return (float(v) - 273.15) if v is not None else None
+
+def parse_metadata(key, body):
+    data = json_loads(body)
+    stats = data.get("scene_statistics", {}) or {}
+    return {
+        "Date": data.get("scene_datetime"),
+        "lst_min":  k2c(stats.get("lst_min")),
+        "lst_max":  k2c(stats.get("lst_max")),
+        "lst_mean": k2c(stats.get("lst_mean")),
+        "std_min":  stats.get("std_min"),
+        "std_max":  stats.get("std_max"),
+        "std_mean": stats.get("std_mean"),
+        "SourceFile": key.split("/")[-1],
+        "SourceKey": key,
+    }
+
+def fetch_rows(objs):
+    """Yield (obj, row or exception), fetching + parsing ``json_workers`` objects at a time."""
+    work = lambda o: parse_metadata(o["key"], store.get(o["key"]))
+    with ThreadPoolExecutor(max_workers=args.json_workers) as ex:
+        futs = [ex.submit(work, o) for o in objs]
+        for o, f in zip(objs, futs):
+            try: yield o, f.result()
+            except Exception as e: yield o, e
+
+def typed(df):
+    df = df.reindex(columns=list(COLUMNS))
+    df["Date"] = pd.to_datetime(df["Date"], utc=True, errors="coerce")
+    return df.astype({c: t for c, t in COLUMNS.items() if t})
+
+def read_summary(key):
+    try:
+        return typed(pd.read_parquet(io.BytesIO(store.get(key))))
+    except KeyError:
+        return None
 
 def main():
-    rows = []
-    print(f"Scanning s3://{BUCKET}/{PREFIX}")
+    print(f"Scanning {store.url(PREFIX)}")
+    out_key = f"{s3_prefix}/{location}/{STEM}.csv"
+    pq_key = f"{s3_prefix}/{location}/{STEM}.parquet"
+    objs = list(iter_objects(PREFIX))
 
-    for key in iter_keys(BUCKET, PREFIX):
-        fname = key.split("/")[-1]
-        if not (fname.endswith(".json") and NEEDLE.lower() in fname.lower()):
-            continue
+    # only new or changed JSONs are fetched; their rows are upserted into the typed Parquet summary
+    old = None if args.full_refresh else read_summary(pq_key)
+    manifest = Manifest(store, manifest_key_for(out_key), refresh=old is None)
+    todo = manifest.changed(objs)
+    print(f"{len(objs)} metadata files listed, {len(todo)} new or changed")
 
-        try:
-            resp = s3.get_object(Bucket=BUCKET, Key=key)
-            data = json.loads(resp["Body"].read().decode("utf-8"))
-
-            stats = data.get("scene_statistics", {}) or {}
-            date_str = data.get("scene_datetime")
-
-            
-            def k2c(v):
-                return (float(v) - 273.15) if v is not None else None
-
-            lst_min_c  = k2c(stats.get("lst_min"))
-            lst_max_c  = k2c(stats.get("lst_max"))
-            lst_mean_c = k2c(stats.get("lst_mean"))
-
-            rows.append({
-                "Date": pd.to_datetime(date_str) if date_str else pd.NaT,
-                "lst_min":  lst_min_c,
-                "lst_max":  lst_max_c,
-                "lst_mean": lst_mean_c,
-                "std_min":  stats.get("std_min"),
-                "std_max":  stats.get("std_max"),
-                "std_mean": stats.get("std_mean"),
-                "SourceFile": fname,
-            })
-            print(f"  processed {fname}")
-        except Exception as e:
-            print(f"  error {fname}: {e}")
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df = df.sort_values("Date").reset_index(drop=True)
-
-    csv_bytes = df.to_csv(index=False).encode("utf-8")
-    out_key = f"{s3_prefix}/{location}/{OUT_CSV}"
-    s3.put_object(Bucket=BUCKET, Key=out_key, Body=csv_bytes)
-    print(f"\n saved summary to s3://{BUCKET}/{out_key}")
+    rows = []
+    for obj, row in fetch_rows(todo):
+        fname = obj["key"].split("/")[-1]
+        if isinstance(row, Exception):
+            print(f"  error {fname}: {row}")          # not recorded -> retried next run
+            continue
+        manifest.record(obj, row)
+        rows.append(row)
+        print(f"  processed {fname}")
+
+    live, stale = {o["key"] for o in objs}, {o["key"] for o in todo}
+    if old is None: old = typed(pd.DataFrame())
+    keep = old[old["SourceKey"].isin(live) & ~old["SourceKey"].isin(stale)]
+    if not rows and len(keep) == len(old) and store.head(out_key) is not None:
+        print(f"\n summary {store.url(out_key)} is up to date")
+        print(f" storage: {store.report()}")
+        return
+
+    # one row per scene (a few hundred per site-year), so the summary is rewritten whole rather than kept as
+    # appended parts: changed and deleted JSONs stay exact without tombstones, and readers get one object
+    df = typed(pd.concat([keep, typed(pd.DataFrame(rows))], ignore_index=True))
+    df = df.sort_values("Date", kind="mergesort").reset_index(drop=True)
+
+    buf = io.BytesIO()
+    df.to_parquet(buf, index=False)
+    store.put(pq_key, buf.getvalue(), content_type="application/vnd.apache.parquet")
+    csv_bytes = df.drop(columns=["SourceKey"]).to_csv(index=False).encode("utf-8")
+    store.put(out_key, csv_bytes, content_type="text/csv")
+    manifest.rows(objs)                                # prune vanished objects
+    manifest.save()
+    removed = len(set(old["SourceKey"]) - live)
+    print(f"\n saved summary to {store.url(out_key)} + .parquet ({len(rows)} new/changed, {removed} removed, {len(df)} rows)")
+    print(f" storage: {store.report()}")
 
 if __name__ == "__main__":
     main()
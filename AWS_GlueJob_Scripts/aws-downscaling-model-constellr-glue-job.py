@@ -1,6 +1,13 @@
-import argparse, os, boto3, json,io
+import argparse, os, json,io, threading
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from storage import open_storage
+from cog_reader import read_band1
+from lst_kernel import lst_stats as kernel_stats
+from manifest import Manifest, manifest_key_for
+from s3_inventory import iter_inventory
 
 
 full = argparse.ArgumentParser()
@@ -13,6 +20,14 @@ full.add_argument("--end_date", required=True)
 full.add_argument("--year", required=True)
 full.add_argument("--s3_bucket", required=True)
 full.add_argument("--s3_prefix", default="lst")
+full.add_argument("--storage", default=None)   # e.g. file:///tmp/standin to run against a local tree
+full.add_argument("--download_workers", type=int, default=16)   # S3 GET threads
+full.add_argument("--decode_workers", type=int, default=None)    # decoder processes (default: CPU count)
+full.add_argument("--max_inflight_mb", type=float, default=512)  # downloaded-but-not-decoded bytes cap
+full.add_argument("--aoi_radius_m", type=float, default=0)      # >0: range-read only tiles within this radius of lat/lon
+full.add_argument("--overview_level", type=int, default=None)    # read a GeoTIFF overview (0 = first) for quick estimates
+full.add_argument("--full_refresh", action="store_true")   # ignore the ETag manifest and resummarise everything
+full.add_argument("--inventory", default=None)   # S3 Inventory manifest.json / CSV / Parquet instead of listing
 args, _ = full.parse_known_args()
 
 lat=args.lat
@@ -30,7 +45,7 @@ BASE_PREFIX = "Constellr_LST/Zaporizhzhia/"
 FILENAME_NEEDLE = "Z_lst"                     
 
 
-s3 = boto3.client("s3")
+store = open_storage(args.storage or BUCKET, max_workers=args.download_workers)
 
 
 try:
@@ -41,41 +56,34 @@ except Exception:
     import tifffile as tiff
     HAVE_RASTERIO = False
 
-def list_subfolders(bucket, base_prefix):
-
-    folders = []
-    paginator = s3.get_paginator("list_objects_v2")
-    for page in paginator.paginate(Bucket=bucket, Prefix=base_prefix, Delimiter="/"):
-        for cp in page.get("CommonPrefixes", []):
-            folders.append(cp["Prefix"])
+def discover_tiffs(base_prefix):
+    """Matching TIFFs under <base_prefix>/<DD-MM-YYYY>/ from one flat listing (or an S3 Inventory),
+    as listing entries (key, size, etag) + "date_folder", sorted by folder date."""
+    source = iter_inventory(store, args.inventory, base_prefix) if args.inventory else store.list(base_prefix)
+    found, skipped = [], set()
+    for obj in source:
+        rest = obj["key"][len(base_prefix):]
+        if "/" not in rest: continue
+        folder, fn = rest.split("/", 1)[0], rest.rsplit("/", 1)[-1]
+        if not (fn.lower().endswith(".tiff") and FILENAME_NEEDLE.lower() in fn.lower()): continue
+        date = pd.to_datetime(folder, format="%d-%m-%Y", errors="coerce")
+        if pd.isna(date):
+            skipped.add(folder); continue
+        found.append((date, obj["key"], {**obj, "date_folder": folder}))
+    if skipped:
+        print(f"  skipped {len(skipped)} folders without a DD-MM-YYYY name: {sorted(skipped)[:5]}")
+    found.sort(key=lambda t: t[:2])
+    return [o for _, _, o in found]
+
+def decode_first_band(body):
     
-    def parse_date(pfx):
-        name = pfx.rstrip("/").split("/")[-1]
-        try: return pd.to_datetime(name, format="%d-%m-%Y")
-        except: return pd.NaT
-    folders.sort(key=parse_date)
-    return folders
-
-def list_matching_tiffs(bucket, folder_prefix):
-    keys = []
-    paginator = s3.get_paginator("list_objects_v2")
-    for page in paginator.paginate(Bucket=bucket, Prefix=folder_prefix):
-        for obj in page.get("Contents", []):
-            fn = obj["Key"].split("/")[-1]
-            if fn.lower().endswith(".tiff") and FILENAME_NEEDLE.lower() in fn.lower():
-                keys.append(obj["Key"])
-    return keys
-
-def read_first_band(bucket, key):
-    
-    body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
     if HAVE_RASTERIO:
         with MemoryFile(body) as mem, mem.open() as src:
-            arr = src.read(1).astype("float32")
+            arr = src.read(1)            # raw dtype; masking + scaling happen in the kernel
             return arr, src.nodata
     else:
         with tiff.TiffFile(io.BytesIO(body)) as tf:
-            arr = tf.asarray().astype("float32")
+            arr = tf.asarray()
             nodata = None
             try:
                 tag = tf.pages[0].tags.get("GDAL_NODATA")
@@ -85,55 +93,138 @@ def read_first_band(bucket, key):
                 pass
             return arr, nodata
 
-def main():
-    
-    out_key = f"{s3_prefix}/{location}/{location}_LST_summary.csv"
+def scene_stats(body):
+    # runs in a decoder process
+    arr, nodata = decode_first_band(body)
+    return {**lst_stats(arr, nodata), "Bytes Read": len(body)}
+
+def lst_stats(arr, nodata):
+    # one blocked pass over the raw DNs; Kelvin scale factor 0.01 → °C applied to the results only
+    s = kernel_stats(arr, nodata=nodata, scale=0.01, offset=-273.15)
+    return {
+        "Min Temp": float(s["min"]),
+        "Max Temp": float(s["max"]),
+        "Mean Temp": float(s["mean"]),
+    }
 
-    results = []
-    folders = list_subfolders(BUCKET, BASE_PREFIX)
-    print(f"Scanning s3://{BUCKET}/{BASE_PREFIX} — {len(folders)} folders")
 
-    for folder in folders:
-        date_folder = folder.rstrip("/").split("/")[-1]
-        print(f"\nChecking: s3://{BUCKET}/{folder}")
-        keys = list_matching_tiffs(BUCKET, folder)
-        if not keys:
-            print("  (no matching TIFFs)")
-            continue
+class ByteBudget:
+    """Caps bytes downloaded but not yet decoded; one oversized object may pass when nothing is in flight."""
 
-        for key in keys:
+    def __init__(self, limit):
+        self.limit, self.used = limit, 0
+        self.cv = threading.Condition()
+
+    def acquire(self, n):
+        with self.cv:
+            self.cv.wait_for(lambda: self.used == 0 or self.used + n <= self.limit)
+            self.used += n
+
+    def release(self, n):
+        with self.cv:
+            self.used -= n
+            self.cv.notify_all()
+
+
+def window_stats(key, size):
+    # ranged read of the AOI window / overview only; small enough to decode in the reader thread
+    arr, nodata, nbytes = read_band1(store, key, size, lonlat=(lon, lat),
+                                     radius_m=args.aoi_radius_m, overview_level=args.overview_level)
+    return {**lst_stats(arr, nodata), "Bytes Read": nbytes}
+
+
+def summarise_windows(items):
+    with ThreadPoolExecutor(max_workers=args.download_workers) as readers:
+        pending = [readers.submit(window_stats, key, size) for _, key, size in items]
+        for (date_folder, key, size), fut in zip(items, pending):
             fname = key.split("/")[-1]
-            print(f"  Processing: {fname}")
+            row = {"Date Folder": date_folder, "Filename": fname}
             try:
-                arr, nodata = read_first_band(BUCKET, key)
-                if nodata is not None:
-                    arr[arr == nodata] = np.nan
-                lst_c = (arr * 0.01) - 273.15  # Kelvin scale factor 0.01 → °C
-
-                results.append({
-                    "Date Folder": date_folder,
-                    "Filename": fname,
-                    "Min Temp": float(np.nanmin(lst_c)),
-                    "Max Temp": float(np.nanmax(lst_c)),
-                    "Mean Temp": float(np.nanmean(lst_c)),
-                })
+                row.update(fut.result())
+                print(f"  Processed: {date_folder}/{fname} ({row['Bytes Read'] / 1e6:.2f} of {size / 1e6:.2f} MB)")
             except Exception as e:
-                print(f"  Error: {e}")
-                results.append({
-                    "Date Folder": date_folder,
-                    "Filename": fname,
-                    "Error": str(e),
-                })
-
-    df = pd.DataFrame(results)
+                print(f"  Error {date_folder}/{fname}: {e}")
+                row["Error"] = str(e)
+            yield row
+
+
+def summarise_tiffs(items):
+    """items = [(date_folder, key, size)]; downloader threads feed decoder processes under a byte budget."""
+    budget = ByteBudget(int(args.max_inflight_mb * 1e6))
+    with ProcessPoolExecutor(max_workers=args.decode_workers) as decoders, \
+         ThreadPoolExecutor(max_workers=args.download_workers) as downloaders:
+
+        def fetch(key, size):
+            budget.acquire(size)
+            try:
+                body = store.get(key)
+            except Exception:
+                budget.release(size)
+                raise
+            fut = decoders.submit(scene_stats, body)
+            fut.add_done_callback(lambda _: budget.release(size))
+            return fut
+
+        pending = [downloaders.submit(fetch, key, size) for _, key, size in items]
+        for (date_folder, key, _), dl in zip(items, pending):
+            fname = key.split("/")[-1]
+            row = {"Date Folder": date_folder, "Filename": fname}
+            try:
+                row.update(dl.result().result())
+                print(f"  Processed: {date_folder}/{fname}")
+            except Exception as e:
+                print(f"  Error {date_folder}/{fname}: {e}")
+                row["Error"] = str(e)
+            yield row
+
+
+def main():
+    
+    out_key = f"{s3_prefix}/{location}/{location}_LST_summary.csv"
+
+    objs = discover_tiffs(BASE_PREFIX)
+    n_folders = len({o["date_folder"] for o in objs})
+    print(f"Scanning {args.inventory or store.url(BASE_PREFIX)} — {n_folders} date folders")
+
+    # only new or changed TIFFs are summarised; the rest come from the manifest beside the CSV
+    windowed = args.aoi_radius_m > 0 or args.overview_level is not None
+    params = {"aoi_radius_m": args.aoi_radius_m, "overview_level": args.overview_level,
+              "lonlat": [lon, lat] if windowed else None}
+    manifest = Manifest(store, manifest_key_for(out_key), params, refresh=args.full_refresh)
+    todo = manifest.changed(objs)
+    items = [(o["date_folder"], o["key"], o["size"]) for o in todo]
+    print(f"{len(objs)} TIFFs listed, {len(items)} new or changed")
+
+    if not items:
+        results = []
+    elif windowed:
+        print(f"{len(items)} TIFFs -> windowed range reads (AOI radius {args.aoi_radius_m:.0f} m, "
+              f"overview {args.overview_level})")
+        results = list(summarise_windows(items))
+    else:
+        print(f"{len(items)} TIFFs -> {args.download_workers} downloaders, "
+              f"{args.decode_workers or os.cpu_count()} decoders, {args.max_inflight_mb:.0f} MB in flight")
+        results = list(summarise_tiffs(items))
+    if results:
+        total = sum(r.get("Bytes Read", 0) for r in results)
+        print(f"Bytes read: {total / 1e6:.1f} MB over {len(results)} scenes")
+
+    errors = []
+    for o, row in zip(todo, results):
+        if "Error" in row: errors.append(row)         # not recorded -> retried next run
+        else: manifest.record(o, row)
+
+    df = pd.DataFrame(manifest.rows(objs) + errors)
     if not df.empty:
         df["Date Folder"] = pd.to_datetime(df["Date Folder"], format="%d-%m-%Y", errors="coerce")
         df = df.dropna(subset=["Date Folder"]).sort_values("Date Folder")
 
     # Write CSV to S3
     csv_bytes = df.to_csv(index=False).encode("utf-8")
-    s3.put_object(Bucket=BUCKET, Key=out_key, Body=csv_bytes)
-    print(f"\n wrote s3://{BUCKET}/{out_key}")
+    store.put(out_key, csv_bytes, content_type="text/csv")
+    manifest.save()
+    print(f"\n wrote {store.url(out_key)} ({manifest.n_new} new/changed of {len(objs)} TIFFs)")
+    print(f" storage: {store.report()}")
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,5 @@
 # main.py
-import argparse, os, boto3, json
+import argparse, boto3, json
 import numpy as np
 import pandas as pd
 # ee.Authenticate()
@@ -29,78 +29,59 @@ from s2_clouds import *
 from landsat_clouds import *
 from recent_collections import *
 from allmodel import *
+from storage import open_storage
+from result_sink import ResultSink
 
-def run(lat, lon, start_date, end_date, location, year, s3_bucket, s3_prefix="lst", tmp="/tmp"):
-    point = [lon, lat]
+def run(lat, lon, start_date, end_date, location, year, s3_bucket, s3_prefix="lst", result_format="csv"):
+    # bucket may also be a local stand-in root (file:///..., ./dir)
+    with ResultSink(open_storage(s3_bucket), f"{s3_prefix}/{location}", result_format) as sink:
+        _run([lon, lat], start_date, end_date, location, year, sink)
+
+def _run(point, start_date, end_date, location, year, sink):
 
     
     final_landsat8_collection, suitablel8_images, final_landsat9_collection, suitablel9_images, extent = mainl8l9(point, start_date, end_date)
     final_S2_collection, suitableS2_images = mainS2(point, start_date, end_date)
 
-    l9_list, l8_list, c8_list, c9_list = getRecent(suitablel8_images, suitablel9_images, suitableS2_images)
+    # one sensor-tagged pairing pass over L8 + L9
+    pairs = pair_scenes(suitablel8_images, suitablel9_images, suitableS2_images)
 
-    out_paths = []
-    if len(l8_list) == 0 and len(l9_list) == 0:
+    if not pairs:
         print("No Landsat matches. Proceeding with Sentinel-2 only fallback.")
-        fallback_path = os.path.join(tmp, f"{location}_S2_only_stats_{year}.csv")
-        sentinel_only_temperature_stats(suitableS2_images, extent, filename=fallback_path)
-        out_paths.append(fallback_path)
-        upload_files(out_paths, s3_bucket, f"{s3_prefix}/{location}")
+        sink.add(f"{location}_S2_only_stats_{year}",
+                 sentinel_only_temperature_stats(suitableS2_images, extent, filename=None))
         return
 
-   
-    stats8_downscale = np.array([])
-    stats8_normal = np.array([])
-    for i in range(len(l8_list)):
-        stat_values, more_values = model(l8_list[i], c8_list[i], extent)
-        print(stat_values)
-        print(more_values)
-        stats8_downscale = np.append(stats8_downscale, stat_values)
-        stats8_normal = np.append(stats8_normal, more_values)
+    # one model queue for both missions; results are split per sensor only at write time
+    results = run_model_queue(pairs, model, extent)
+    stats8_downscale, stats8_normal = (np.array(r) for r in results.get("L8", ([], [])))
+    stats9_downscale, stats9_normal = (np.array(r) for r in results.get("L9", ([], [])))
+    n8, n9 = len(stats8_downscale), len(stats9_downscale)
+    for sensor in ("L8", "L9"):
+        for stat_values, more_values in zip(*results.get(sensor, ([], []))):
+            print(stat_values)
+            print(more_values)
+
     #Write landsat 8 downscale
-    stats = stats8_downscale.reshape(len(l8_list), 7)
+    stats = stats8_downscale.reshape(n8, 7)
     df = pd.DataFrame(stats, columns=['Landsat_Image_ID','Sentinel_Image_ID', 'Landsat_8_acquisition_date','Sentinel_2_acquisition_date','Max_Temp','Min_Temp','Mean_Temp'])
-    path = os.path.join(tmp, f"{location}_stats8_downscale_{year}.csv")
-    df.to_csv(path, index=False); out_paths.append(path)
+    sink.add(f"{location}_stats8_downscale_{year}", df)
     
     #Write landsat 8 normal
-    stats = stats8_normal.reshape(len(l8_list), 7)
+    stats = stats8_normal.reshape(n8, 7)
     df = pd.DataFrame(stats, columns=['Landsat Image ID','Sentinel Image ID','Landsat 8 acquisition date','Sentinel 2 acquisition date','Max Temp','Min Temp','Mean Temp'])
-    path = os.path.join(tmp, f"{location}_stats8_normal_{year}.csv")
-    df.to_csv(path, index=False); out_paths.append(path)
+    sink.add(f"{location}_stats8_normal_{year}", df)
 
     
-    stats9_downscale = np.array([])
-    stats9_normal = np.array([])
-    for i in range(len(l9_list)):
-        stat_values, more_values = model(l9_list[i], c9_list[i], extent)
-        print(stat_values)
-        print(more_values)
-        stats9_downscale = np.append(stats9_downscale, stat_values)
-        stats9_normal = np.append(stats9_normal, more_values)
-
-  
-    print("stats8_downscale length:", stats8_downscale.size, "expected:", len(l8_list)*7)
-    stats = stats9_downscale.reshape(len(l9_list), 7)
+    print("stats8_downscale length:", stats8_downscale.size, "expected:", n8*7)
+    stats = stats9_downscale.reshape(n9, 7)
     df = pd.DataFrame(stats, columns=['Landsat Image ID','Sentinel Image ID', 'Landsat 9 acquisition date','Sentinel 2 acquisition date', 'Max Temp','Min Temp','Mean Temp'])
 
-    path = os.path.join(tmp, f"{location}_stats9_downscale_{year}.csv")
-    df.to_csv(path, index=False); out_paths.append(path)
+    sink.add(f"{location}_stats9_downscale_{year}", df)
 
-    stats = stats9_normal.reshape(len(l9_list), 7)
+    stats = stats9_normal.reshape(n9, 7)
     df = pd.DataFrame(stats, columns=['Landsat Image ID','Sentinel Image ID','Landsat 9 acquisition date','Sentinel 2 acquisition date','Max Temp','Min Temp','Mean Temp'])
-    path = os.path.join(tmp, f"{location}_stats9_normal_{year}.csv")  # <- fixed name
-    df.to_csv(path, index=False); out_paths.append(path)
-
-    # upload to S3
-    upload_files(out_paths, s3_bucket, f"{s3_prefix}/{location}")
-
-def upload_files(paths, bucket, prefix):
-    s3 = boto3.client("s3")
-    for p in paths:
-        key = f"{prefix}/{os.path.basename(p)}"
-        s3.upload_file(p, bucket, key)
-        print(f"Uploaded s3://{bucket}/{key}")
+    sink.add(f"{location}_stats9_normal_{year}", df)
 
 if __name__ == "__main__":
     full = argparse.ArgumentParser()
@@ -113,6 +94,7 @@ if __name__ == "__main__":
     full.add_argument("--year", required=True)
     full.add_argument("--s3_bucket", required=True)
     full.add_argument("--s3_prefix", default="lst")
+    full.add_argument("--result_format", default="csv")      # "csv" (default), "csv.gz" or "parquet"
     args, _ = full.parse_known_args()
     
     
@@ -127,5 +109,6 @@ if __name__ == "__main__":
         location=args.location,
         year=args.year,                          # pass year into run
         s3_bucket=args.s3_bucket,
-        s3_prefix=args.s3_prefix
+        s3_prefix=args.s3_prefix,
+        result_format=args.result_format
     )
\ No newline at end of file
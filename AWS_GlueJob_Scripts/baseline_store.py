@@ -0,0 +1,163 @@
+# baseline_store.py
+# Incremental ΔT baselines: one bucket per (site, group, year-month) holding sufficient statistics,
+# lognormal log-moments and a fixed-bin histogram sketch. Adding a scene is O(1); expanding or
+# rolling-window baselines are sums over buckets, so history is never rescanned. The store also keeps
+# each series' observation dates and a small record per input object, so a job can fold in only the
+# bytes appended since the last run.
+
+import json
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+SKETCH_RANGE = (-30.0, 70.0)   # ΔT (°C) covered by the histogram sketch; outside values clip to the edges
+SKETCH_BINS  = 1000            # 0.1 °C resolution
+
+
+def _new_bucket():
+    return {"n": 0, "sum": 0.0, "sumsq": 0.0, "n_pos": 0, "sum_log": 0.0, "sumsq_log": 0.0,
+            "min": np.inf, "max": -np.inf, "hist": np.zeros(SKETCH_BINS, dtype=np.int64)}
+
+def _bins(v):
+    lo, hi = SKETCH_RANGE
+    idx = np.floor((np.asarray(v, dtype="float64") - lo) / ((hi - lo) / SKETCH_BINS)).astype(np.int64)
+    return np.clip(idx, 0, SKETCH_BINS - 1)
+
+def _centers():
+    lo, hi = SKETCH_RANGE
+    w = (hi - lo) / SKETCH_BINS
+    return lo + (np.arange(SKETCH_BINS) + 0.5) * w
+
+def _hist_quantile(hist, q, values):
+    # linear interpolation between neighbouring ranks (np.percentile style); values = per-bin value
+    cum = np.cumsum(hist)
+    if cum[-1] == 0: return np.nan
+    pos = q * (cum[-1] - 1)
+    k = int(np.floor(pos))
+    a, b = np.searchsorted(cum, [k, min(k + 1, cum[-1] - 1)], side="right")
+    return float(values[a] + (values[b] - values[a]) * (pos - k))
+
+
+class BaselineStore:
+    """Per-(site, group, YYYY-MM) sufficient statistics with O(1) updates."""
+
+    def __init__(self):
+        self.buckets = {}        # (site, group, "YYYY-MM") -> bucket
+        self.last_date = {}      # (site, group) -> latest date added ("YYYY-MM-DD")
+        self.dates = {}          # (site, group) -> set of observation dates ("YYYY-MM-DD")
+        self.sources = {}        # input object key -> {"etag", "size", ...} as last folded in
+
+    #  updates
+    def add(self, site, group, obs_date, value):
+        if value is None or not np.isfinite(value): return
+        d = pd.Timestamp(obs_date)
+        b = self.buckets.setdefault((site, group, d.strftime("%Y-%m")), _new_bucket())
+        b["n"] += 1; b["sum"] += value; b["sumsq"] += value*value
+        b["min"] = min(b["min"], value); b["max"] = max(b["max"], value)
+        if value > 0:
+            lv = np.log(value)
+            b["n_pos"] += 1; b["sum_log"] += lv; b["sumsq_log"] += lv*lv
+        b["hist"][_bins(value)] += 1
+        key, ds = (site, group), d.strftime("%Y-%m-%d")
+        if ds > self.last_date.get(key, ""): self.last_date[key] = ds
+        self.dates.setdefault(key, set()).add(ds)
+
+    def add_frame(self, df, site, group, date_col, value_col, only_new=True):
+        """Add rows of ``df``; with ``only_new`` rows on/before the stored last date are skipped."""
+        d = pd.to_datetime(df[date_col], errors="coerce")
+        v = pd.to_numeric(df[value_col], errors="coerce")
+        keep = d.notna() & np.isfinite(v)
+        last = self.last_date.get((site, group))
+        if only_new and last: keep &= d > pd.Timestamp(last)
+        for dt, x in zip(d[keep], v[keep]):
+            self.add(site, group, dt, float(x))
+        return int(keep.sum())
+
+    def drop(self, site, group):
+        """Forget one series (e.g. before re-adding a rewritten input)."""
+        self.buckets = {k: b for k, b in self.buckets.items() if k[:2] != (site, group)}
+        self.last_date.pop((site, group), None)
+        self.dates.pop((site, group), None)
+
+    #  queries
+    def _select(self, site, group, month=None, start=None, end=None):
+        start = pd.Timestamp(start).strftime("%Y-%m") if start is not None else ""
+        end = pd.Timestamp(end).strftime("%Y-%m") if end is not None else "9999-99"
+        for (s, g, ym), b in self.buckets.items():
+            if s != site or g != group or not (start <= ym <= end): continue
+            if month is not None and int(ym[5:7]) != int(month): continue
+            yield b
+
+    def _window(self, site, group, month, start, end, window_years):
+        if window_years and end is not None:
+            start = pd.Timestamp(end) - pd.DateOffset(years=window_years) + pd.DateOffset(months=1)
+        return self._select(site, group, month, start, end)
+
+    def summary(self, site, group, month=None, start=None, end=None, window_years=None):
+        """Aggregate stats over buckets in [start, end] (or the ``window_years`` before ``end``)."""
+        agg = _new_bucket()
+        for b in self._window(site, group, month, start, end, window_years):
+            for k in ("n", "sum", "sumsq", "n_pos", "sum_log", "sumsq_log"): agg[k] += b[k]
+            agg["min"] = min(agg["min"], b["min"]); agg["max"] = max(agg["max"], b["max"])
+            agg["hist"] += b["hist"]
+        n, c = agg["n"], _centers()
+        out = {"n": n, "min": agg["min"] if n else np.nan, "max": agg["max"] if n else np.nan,
+               "mean": agg["sum"]/n if n else np.nan,
+               "std": np.sqrt(max(agg["sumsq"]/n - (agg["sum"]/n)**2, 0.0)) if n else np.nan,
+               "n_pos": agg["n_pos"], "log_mu": np.nan, "log_sigma": np.nan}
+        if agg["n_pos"]:
+            mu = agg["sum_log"] / agg["n_pos"]
+            out["log_mu"] = mu
+            out["log_sigma"] = np.sqrt(max(agg["sumsq_log"]/agg["n_pos"] - mu*mu, 0.0))
+        med = _hist_quantile(agg["hist"], 0.5, c)
+        out["median"] = med
+        if np.isfinite(med):
+            # MAD from the sketch: weighted median of |center - median|
+            dev = np.abs(c - med); o = np.argsort(dev)
+            out["mad"] = _hist_quantile(agg["hist"][o], 0.5, dev[o])
+        else:
+            out["mad"] = np.nan
+        return out
+
+    def observation_dates(self, site, group):
+        return pd.to_datetime(sorted(self.dates.get((site, group), ())))
+
+    def lognorm_threshold(self, site, group, q=0.99, **window):
+        """Lognormal q-quantile from stored log-moments; (nan, n_pos) if fewer than 5 positives."""
+        s = self.summary(site, group, **window)
+        if s["n_pos"] < 5 or not np.isfinite(s["log_sigma"]) or s["log_sigma"] <= 1e-12:
+            return np.nan, s["n_pos"]
+        return float(np.exp(s["log_mu"] + s["log_sigma"] * norm.ppf(q))), s["n_pos"]
+
+    #  persistence
+    def to_json(self):
+        bl = []
+        for (s, g, ym), b in self.buckets.items():
+            nz = np.flatnonzero(b["hist"])
+            bl.append({"site": s, "group": g, "period": ym,
+                       **{k: b[k] for k in ("n", "sum", "sumsq", "n_pos", "sum_log", "sumsq_log", "min", "max")},
+                       "hist": {int(i): int(b["hist"][i]) for i in nz}})
+        return json.dumps({"sketch_range": SKETCH_RANGE, "sketch_bins": SKETCH_BINS,
+                           "last_date": [[s, g, d] for (s, g), d in self.last_date.items()],
+                           "dates": [[s, g, sorted(ds)] for (s, g), ds in self.dates.items()],
+                           "sources": self.sources,
+                           "buckets": bl})
+
+    @classmethod
+    def from_json(cls, text):
+        """Store from ``to_json`` output; ValueError if it was built with another sketch configuration."""
+        st = cls()
+        if not text: return st
+        d = json.loads(text)
+        cfg = (tuple(d.get("sketch_range", ())), d.get("sketch_bins"))
+        if cfg != (tuple(SKETCH_RANGE), SKETCH_BINS):
+            raise ValueError(f"baseline store sketch {cfg} does not match the current "
+                             f"{(SKETCH_RANGE, SKETCH_BINS)}; rebuild it from the full history")
+        for b in d["buckets"]:
+            h = np.zeros(SKETCH_BINS, dtype=np.int64)
+            for i, cnt in b.pop("hist").items(): h[int(i)] = cnt
+            st.buckets[(b.pop("site"), b.pop("group"), b.pop("period"))] = {**b, "hist": h}
+        st.last_date = {(s, g): dt for s, g, dt in d["last_date"]}
+        st.dates = {(s, g): set(ds) for s, g, ds in d.get("dates", [])}
+        st.sources = d.get("sources", {})
+        return st
@@ -0,0 +1,187 @@
+# cog_reader.py
+# Ranged reads of band 1 from GeoTIFFs held in a storage backend (see storage.py). Only the header and the
+# tiles/strips that intersect the AOI window are fetched, optionally from an overview level. Works through
+# rasterio (custom opener over the same ranged file object) or tifffile, and reports the bytes transferred.
+
+import io
+import math
+import numpy as np
+
+try:
+    import rasterio
+    from rasterio.windows import Window
+    from rasterio.warp import transform as warp_transform
+    HAVE_RASTERIO = True
+except Exception:
+    HAVE_RASTERIO = False
+
+try:
+    import tifffile
+except Exception:
+    tifffile = None
+
+try:
+    from pyproj import Transformer
+    HAVE_PYPROJ = True
+except Exception:
+    HAVE_PYPROJ = False
+
+BLOCK = 1 << 16        # range-request granularity (64 KiB); adjacent missing blocks are fetched in one GET
+M_PER_DEG = 111_320.0
+
+
+class RangeFile(io.RawIOBase):
+    """Seekable read-only file over ``storage.get(key, byte_range=...)`` with a shared block cache."""
+
+    def __init__(self, storage, key, size=None, block=BLOCK, shared=None):
+        self.storage, self.key, self.block = storage, key, block
+        self.shared = shared if shared is not None else {
+            "size": size if size is not None else storage.head(key)["size"],
+            "blocks": {}, "bytes_read": 0, "requests": 0}
+        self.size, self.pos = self.shared["size"], 0
+
+    def reopen(self, path, *_, **__):
+        # rasterio opener: GDAL may reopen the dataset (reuse the cache) and probes sidecars (.aux.xml, .msk)
+        if path != self.key: raise FileNotFoundError(path)
+        return RangeFile(self.storage, self.key, block=self.block, shared=self.shared)
+
+    @property
+    def bytes_read(self): return self.shared["bytes_read"]
+
+    @property
+    def requests(self): return self.shared["requests"]
+
+    def readable(self): return True
+    def seekable(self): return True
+    def tell(self): return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self.pos = offset if whence == io.SEEK_SET else (
+            self.pos + offset if whence == io.SEEK_CUR else self.size + offset)
+        return self.pos
+
+    def _fetch(self, b0, b1):
+        blocks, b = self.shared["blocks"], b0
+        while b <= b1:
+            if b in blocks: b += 1; continue
+            e = b
+            while e + 1 <= b1 and e + 1 not in blocks: e += 1
+            data = self.storage.get(self.key, byte_range=(b * self.block, min((e + 1) * self.block, self.size) - 1))
+            self.shared["bytes_read"] += len(data); self.shared["requests"] += 1
+            for i in range(b, e + 1):
+                blocks[i] = data[(i - b) * self.block:(i - b + 1) * self.block]
+            b = e + 1
+
+    def readinto(self, buf):
+        n = min(len(buf), self.size - self.pos)
+        if n <= 0: return 0
+        b0, b1 = self.pos // self.block, (self.pos + n - 1) // self.block
+        self._fetch(b0, b1)
+        data = b"".join(self.shared["blocks"][i] for i in range(b0, b1 + 1))
+        off = self.pos - b0 * self.block
+        buf[:n] = data[off:off + n]
+        self.pos += n
+        return n
+
+
+#  1) rasterio path
+def _read_rasterio(f, lonlat, radius_m, overview_level):
+    kw = {}
+    if overview_level is not None:
+        # clamp to the overviews present (none -> full resolution), as on the tifffile path
+        with rasterio.open(f.key, opener=f.reopen) as src:
+            n_ovr = len(src.overviews(1))
+        if n_ovr: kw["overview_level"] = min(overview_level, n_ovr - 1)
+    with rasterio.open(f.key, opener=f.reopen, **kw) as src:
+        win = None
+        if lonlat is not None and radius_m and src.crs is not None:     # not georeferenced -> whole band
+            lon, lat = lonlat
+            xs, ys = warp_transform("EPSG:4326", src.crs, [lon], [lat])
+            rx = ry = radius_m
+            if src.crs.is_geographic:
+                ry = radius_m / M_PER_DEG
+                rx = ry / max(math.cos(math.radians(lat)), 1e-6)
+            t = src.transform                      # north-up: x = c + col*a, y = f + row*e
+            c0, c1 = sorted(((xs[0] - rx - t.c) / t.a, (xs[0] + rx - t.c) / t.a))
+            r0, r1 = sorted(((ys[0] + ry - t.f) / t.e, (ys[0] - ry - t.f) / t.e))
+            c0, c1 = max(0, int(math.floor(c0))), min(src.width, int(math.ceil(c1)))
+            r0, r1 = max(0, int(math.floor(r0))), min(src.height, int(math.ceil(r1)))
+            if c0 >= c1 or r0 >= r1: raise ValueError(f"AOI outside scene {f.key}")
+            win = Window(c0, r0, c1 - c0, r1 - r0)
+        return src.read(1, window=win), src.nodata
+
+
+#  2) tifffile path
+def _geo_window(tf, page, lonlat, radius_m):
+    """(r0, r1, c0, c1) pixel window of ``page`` around lon/lat, or None if it cannot be georeferenced."""
+    base = tf.pages[0]
+    scale, tie = base.tags.get("ModelPixelScaleTag"), base.tags.get("ModelTiepointTag")
+    if scale is None or tie is None: return None
+    sx, sy = scale.value[0], scale.value[1]
+    i0, j0, x0, y0 = tie.value[0], tie.value[1], tie.value[3], tie.value[4]
+    geo = tf.geotiff_metadata or {}
+    epsg = geo.get("ProjectedCSTypeGeoKey") or geo.get("GeographicTypeGeoKey")
+    lon, lat = lonlat
+    if epsg is not None and int(epsg) == 4326:
+        x, y = lon, lat
+        ry = radius_m / M_PER_DEG
+        rx = ry / max(math.cos(math.radians(lat)), 1e-6)
+    elif epsg is not None and HAVE_PYPROJ:
+        x, y = Transformer.from_crs(4326, int(epsg), always_xy=True).transform(lon, lat)
+        rx = ry = radius_m
+    else:
+        return None
+    f = base.imagewidth / page.imagewidth          # overview decimation
+    c0, c1 = (x - rx - x0) / sx + i0, (x + rx - x0) / sx + i0
+    r0, r1 = (y0 - (y + ry)) / sy + j0, (y0 - (y - ry)) / sy + j0
+    c0, c1 = max(0, int(math.floor(c0 / f))), min(page.imagewidth, int(math.ceil(c1 / f)))
+    r0, r1 = max(0, int(math.floor(r0 / f))), min(page.imagelength, int(math.ceil(r1 / f)))
+    return (r0, r1, c0, c1)
+
+def _read_page_window(page, fh, r0, r1, c0, c1):
+    """Decode only the segments (tiles or strips) of ``page`` that intersect rows r0:r1, cols c0:c1."""
+    th, tw = (page.tilelength, page.tilewidth) if page.is_tiled else (page.rowsperstrip, page.imagewidth)
+    ntx = -(-page.imagewidth // tw)
+    out = np.zeros((r1 - r0, c1 - c0), dtype=page.dtype)
+    for ty in range(r0 // th, (r1 - 1) // th + 1):
+        for tx in range(c0 // tw, (c1 - 1) // tw + 1):
+            idx = ty * ntx + tx
+            fh.seek(page.dataoffsets[idx])
+            seg, (_, _, y, x, _), _ = page.decode(fh.read(page.databytecounts[idx]), idx, jpegtables=page.jpegtables)
+            seg = seg[0, :, :, 0]
+            ya, yb = max(r0, y), min(r1, y + seg.shape[0])
+            xa, xb = max(c0, x), min(c1, x + seg.shape[1])
+            if ya < yb and xa < xb:
+                out[ya - r0:yb - r0, xa - c0:xb - c0] = seg[ya - y:yb - y, xa - x:xb - x]
+    return out
+
+def _read_tifffile(f, lonlat, radius_m, overview_level):
+    with tifffile.TiffFile(f) as tf:
+        page = tf.pages[0]
+        if overview_level is not None:
+            levels = tf.series[0].levels
+            page = levels[min(overview_level + 1, len(levels) - 1)].keyframe
+        nodata = None
+        tag = tf.pages[0].tags.get("GDAL_NODATA")
+        if tag and tag.value not in (None, ""):
+            nodata = float(tag.value)
+        win = _geo_window(tf, page, lonlat, radius_m) if lonlat is not None and radius_m else None
+        if win is None:
+            win = (0, page.imagelength, 0, page.imagewidth)
+        if win[0] >= win[1] or win[2] >= win[3]: raise ValueError(f"AOI outside scene {f.key}")
+        if page.samplesperpixel != 1 or page.planarconfig != 1 or page.imagedepth != 1:
+            arr = page.asarray()[win[0]:win[1], win[2]:win[3]]     # uncommon layouts: read the whole page
+            arr = arr if arr.ndim == 2 else arr[..., 0]
+        else:
+            arr = _read_page_window(page, tf.filehandle, *win)
+        return arr, nodata
+
+
+def read_band1(storage, key, size=None, lonlat=None, radius_m=0, overview_level=None):
+    """(raw band-1 array, nodata, bytes transferred) for the AOI window (lon/lat ± radius_m) of ``key``."""
+    f = RangeFile(storage, key, size)
+    if HAVE_RASTERIO:
+        arr, nodata = _read_rasterio(f, lonlat, radius_m, overview_level)
+    else:
+        arr, nodata = _read_tifffile(f, lonlat, radius_m, overview_level)
+    return arr, nodata, f.bytes_read
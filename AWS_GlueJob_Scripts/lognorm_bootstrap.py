@@ -0,0 +1,67 @@
+# lognorm_bootstrap.py
+# Batched bootstrap CIs for the ΔT anomaly threshold (lognormal or empirical 99th percentile).
+# All resamples are drawn as one (B x n) index matrix, processed in chunks to bound memory.
+
+import numpy as np
+from scipy.stats import norm
+
+CHUNK_CELLS = 1 << 23        # ~8M resampled values per chunk
+
+
+def _chunks(n_boot, n, chunk_cells=CHUNK_CELLS):
+    step = max(1, chunk_cells // max(n, 1))
+    for s in range(0, n_boot, step):
+        yield min(step, n_boot - s)
+
+def bootstrap_lognorm_thresholds(pos, q=0.99, n_boot=100_000, seed=None):
+    """Lognormal q-quantile of each bootstrap resample of the positive values ``pos``."""
+    logs = np.log(np.asarray(pos, dtype="float64"))
+    n, z = logs.size, norm.ppf(q)
+    rng = np.random.default_rng(seed)
+    out = []
+    for b in _chunks(n_boot, n):
+        idx = rng.integers(0, n, size=(b, n), dtype=np.int32)
+        lx = logs[idx]
+        mu = lx.mean(axis=1)
+        sigma = np.sqrt(np.maximum((lx*lx).mean(axis=1) - mu*mu, 0.0))   # ddof=0, like np.std
+        out.append(np.exp(mu + sigma*z))      # == lognorm.ppf(q, s=sigma, scale=exp(mu))
+    return np.concatenate(out) if out else np.empty(0)
+
+def bootstrap_empirical_thresholds(v, q=0.99, n_boot=100_000, seed=None):
+    v = np.asarray(v, dtype="float64")
+    rng = np.random.default_rng(seed)
+    out = []
+    for b in _chunks(n_boot, v.size):
+        out.append(np.quantile(v[rng.integers(0, v.size, size=(b, v.size), dtype=np.int32)], q, axis=1))
+    return np.concatenate(out) if out else np.empty(0)
+
+def threshold_ci(values, method="lognormal_99", q=0.99, n_boot=100_000, ci=0.95, seed=None):
+    """(low, high) bootstrap CI for the threshold produced by ``method``; NaNs if not enough data."""
+    v = np.asarray(values, dtype="float64")
+    v = v[np.isfinite(v)]
+    if method == "lognormal_99":
+        v = v[v > 0]
+        boot = bootstrap_lognorm_thresholds(v, q, n_boot, seed) if v.size >= 5 else np.empty(0)
+    elif method == "empirical_99":
+        boot = bootstrap_empirical_thresholds(v, q, n_boot, seed) if v.size else np.empty(0)
+    else:
+        boot = np.empty(0)
+    if boot.size == 0: return (np.nan, np.nan)
+    a = (1 - ci) / 2
+    lo, hi = np.quantile(boot, [a, 1 - a])
+    return (float(lo), float(hi))
+
+
+def moments_lognorm_ci(mu, sigma, n, q=0.99, n_boot=100_000, ci=0.95, seed=None):
+    """(low, high) parametric bootstrap CI for exp(mu + sigma*z_q) from stored log-moments of ``n`` values.
+
+    Resampled log-means are N(mu, sigma^2/n) and n*sigma*^2/sigma^2 ~ chi2(n-1) (ddof=0), so no raw
+    history is needed.
+    """
+    if n < 5 or not (np.isfinite(mu) and np.isfinite(sigma)) or sigma <= 1e-12: return (np.nan, np.nan)
+    rng = np.random.default_rng(seed)
+    m = rng.normal(mu, sigma / np.sqrt(n), n_boot)
+    s = sigma * np.sqrt(rng.chisquare(n - 1, n_boot) / n)
+    a = (1 - ci) / 2
+    lo, hi = np.quantile(np.exp(m + s*norm.ppf(q)), [a, 1 - a])
+    return (float(lo), float(hi))
@@ -0,0 +1,186 @@
+# lst_kernel.py
+# Single-pass LST statistics over raw (usually integer) raster values. Nodata and cloud masks are applied
+# per block, scale/offset (e.g. DN*0.01 - 273.15) only to the final numbers, so no full-size float copy,
+# mask or scaled array is ever made. Percentiles come from a streaming histogram (exact for <=16-bit data).
+
+import numpy as np
+
+# Default value range for float rasters (covers °C and K); integer rasters use their dtype range
+FLOAT_RANGE = (-150.0, 450.0)
+HIST_BINS   = 65536
+BLOCK_ROWS  = 256
+
+
+class StreamingQuantiles:
+    """Fixed-bin histogram quantiles plus exact count/min/max/mean; memory is O(bins).
+
+    Integer rasters up to 16 bit get one bin per value, so quantiles are exact in one pass.
+    Float rasters are binned over a fixed range; ``refine`` re-bins only the bins that
+    hold the requested quantiles on a second pass over the blocks.
+    """
+
+    def __init__(self, lo, hi, bins=HIST_BINS, exact=False):
+        self.lo, self.hi, self.bins, self.exact = float(lo), float(hi), int(bins), exact
+        self.width = (self.hi - self.lo) / self.bins
+        self.hist = np.zeros(self.bins, dtype=np.int64)
+        self.n, self.total = 0, 0.0
+        self.vmin, self.vmax = np.inf, -np.inf
+        self._cum = None
+        self._sub = {}
+
+    @classmethod
+    def for_dtype(cls, dtype, value_range=None, bins=HIST_BINS):
+        dt = np.dtype(dtype)
+        if dt.kind in "ui" and dt.itemsize <= 2:
+            info = np.iinfo(dt)
+            return cls(info.min, info.max + 1, info.max - info.min + 1, exact=True)
+        lo, hi = value_range or FLOAT_RANGE
+        return cls(lo, hi, bins)
+
+    def _bin_index(self, v):
+        if self.exact: return v.astype(np.int64) - int(self.lo)
+        idx = np.floor((v - self.lo) / self.width).astype(np.int64)
+        return np.clip(idx, 0, self.bins - 1, out=idx)   # under/overflow land in the edge bins
+
+    def update(self, v):
+        # v: 1-D block of valid values
+        if v.size == 0: return
+        self.n += v.size
+        self.total += float(v.sum(dtype=np.float64))
+        self.vmin = min(self.vmin, float(v.min())); self.vmax = max(self.vmax, float(v.max()))
+        self.hist += np.bincount(self._bin_index(v), minlength=self.bins)
+        self._cum = None
+
+    @property
+    def mean(self):
+        return self.total / self.n if self.n else np.nan
+
+    def _cumsum(self):
+        if self._cum is None: self._cum = np.cumsum(self.hist)
+        return self._cum
+
+    def _ranks(self, q):
+        pos = (self.n - 1) * q / 100.0
+        k = int(np.floor(pos))
+        return pos, k, min(k + 1, self.n - 1)
+
+    def _bin_of_rank(self, k):
+        cum = self._cumsum()
+        b = int(np.searchsorted(cum, k, side="right"))
+        return b, (int(cum[b - 1]) if b else 0)
+
+    def _edges(self, b):
+        edge = self.lo + b * self.width
+        left = self.vmin if b == 0 else max(edge, self.vmin)
+        right = self.vmax if b == self.bins - 1 else min(edge + self.width, self.vmax)
+        return left, max(right, left)
+
+    def _rank_value(self, k):
+        b, before = self._bin_of_rank(k)
+        if self.exact: return self.lo + b
+        if b in self._sub: return self._sub[b]._rank_value(k - before)
+        left, right = self._edges(b)
+        return left + (right - left) * (k - before + 0.5) / self.hist[b]
+
+    def quantile(self, q):
+        # q in percent, linear interpolation like np.percentile
+        if self.n == 0: return np.nan
+        pos, k, k1 = self._ranks(q)
+        a = self._rank_value(k)
+        return float(a + (self._rank_value(k1) - a) * (pos - k))
+
+    def needs_refine(self):
+        return not self.exact and self.n > 0
+
+    def start_refine(self, qs):
+        # sub-histograms for the bins that hold the requested quantiles
+        for q in qs:
+            _, k, k1 = self._ranks(q)
+            for r in (k, k1):
+                b, _ = self._bin_of_rank(r)
+                if b not in self._sub and self.hist[b] > 1:
+                    left, right = self._edges(b)
+                    self._sub[b] = StreamingQuantiles(left, np.nextafter(right, np.inf), self.bins)
+
+    def update_refine(self, v):
+        if not self._sub or v.size == 0: return
+        idx = self._bin_index(v)
+        for b, sub in self._sub.items():
+            sub.update(v[idx == b])
+
+
+class LstStats:
+    """Blocked accumulator: feed raw blocks (+ optional cloud blocks, nonzero = cloudy), read ``result()``."""
+
+    def __init__(self, nodata=None, scale=1.0, offset=0.0, qs=(), value_range=None):
+        self.nodata, self.scale, self.offset = nodata, float(scale), float(offset)
+        self.qs, self.value_range = tuple(qs), value_range
+        self.n, self.s1, self.s2, self.shift = 0, 0.0, 0.0, None
+        self.vmin, self.vmax = np.inf, -np.inf
+        self.sq = None
+
+    def _valid(self, raw, cloud=None):
+        ok = None
+        if self.nodata is not None and not (isinstance(self.nodata, float) and np.isnan(self.nodata)):
+            ok = raw != self.nodata
+        if raw.dtype.kind == "f":
+            fin = np.isfinite(raw)
+            ok = fin if ok is None else (ok & fin)
+        if cloud is not None:
+            clear = cloud == 0
+            ok = clear if ok is None else (ok & clear)
+        return raw.ravel() if ok is None else raw[ok]
+
+    def update(self, raw, cloud=None):
+        v = self._valid(raw, cloud)
+        if v.size == 0: return
+        if self.shift is None: self.shift = float(v[0])          # shifted sums keep the variance accurate
+        d = v.astype(np.float64) - self.shift
+        self.n += v.size
+        self.s1 += float(d.sum()); self.s2 += float(np.dot(d, d))
+        self.vmin = min(self.vmin, float(v.min())); self.vmax = max(self.vmax, float(v.max()))
+        if self.qs:
+            if self.sq is None: self.sq = StreamingQuantiles.for_dtype(v.dtype, self._raw_range())
+            self.sq.update(v)
+
+    def _raw_range(self):
+        # value_range is given in output units; the histogram runs on raw values
+        if self.value_range is None: return None
+        lo, hi = ((np.asarray(self.value_range, dtype=float) - self.offset) / self.scale)
+        return (min(lo, hi), max(lo, hi))
+
+    def needs_refine(self):
+        return self.sq is not None and self.sq.needs_refine()
+
+    def start_refine(self):
+        self.sq.start_refine(self.qs)
+
+    def update_refine(self, raw, cloud=None):
+        self.sq.update_refine(self._valid(raw, cloud))
+
+    def result(self):
+        """count/min/max/mean/std (+ p<q>) in output units (raw * scale + offset); NaNs if no valid pixel."""
+        out = {"count": self.n, "min": np.nan, "max": np.nan, "mean": np.nan, "std": np.nan}
+        out.update({f"p{q:g}": np.nan for q in self.qs})
+        if not self.n: return out
+        m = self.s1 / self.n
+        lo, hi = sorted((self.vmin * self.scale + self.offset, self.vmax * self.scale + self.offset))
+        out.update(min=lo, max=hi, mean=(self.shift + m) * self.scale + self.offset,
+                   std=float(np.sqrt(max(self.s2 / self.n - m * m, 0.0))) * abs(self.scale))
+        for q in self.qs:
+            # percentiles commute with a positive scale; a negative one mirrors q
+            out[f"p{q:g}"] = self.sq.quantile(q if self.scale >= 0 else 100 - q) * self.scale + self.offset
+        return out
+
+
+def lst_stats(raw, nodata=None, cloud=None, scale=1.0, offset=0.0, qs=(), value_range=None,
+              block_rows=BLOCK_ROWS):
+    """Stats of an in-memory raw band in row blocks (two passes only for float percentiles)."""
+    k = LstStats(nodata, scale, offset, qs, value_range)
+    blocks = lambda: ((raw[r:r + block_rows], None if cloud is None else cloud[r:r + block_rows])
+                      for r in range(0, raw.shape[0], block_rows))
+    for a, c in blocks(): k.update(a, c)
+    if k.needs_refine():
+        k.start_refine()
+        for a, c in blocks(): k.update_refine(a, c)
+    return k.result()
@@ -0,0 +1,68 @@
+# manifest.py
+# ETag manifest kept beside a summary output: one entry per source object (key, ETag, size, derived row).
+# Reruns only process objects that are new or whose ETag/size changed; everything else is taken from the
+# manifest, so a run costs one listing plus the new deliveries instead of the whole archive.
+#
+#   m = Manifest(store, manifest_key_for(out_key), params={"aoi_radius_m": 0})
+#   todo = m.changed(objects)                    # objects: dicts with key/etag/size (storage.list)
+#   for obj in todo: m.record(obj, summarise(obj))
+#   df = pd.DataFrame(m.rows(objects)); m.save()
+
+import json
+
+VERSION = 1
+
+
+def manifest_key_for(out_key):
+    """<summary>.csv -> <summary>_manifest.json in the same prefix."""
+    base = out_key[:-4] if out_key.lower().endswith(".csv") else out_key
+    return f"{base}_manifest.json"
+
+
+class Manifest:
+    """Per-object ETag/size + derived row; ``params`` that change the rows (e.g. AOI radius) reset it."""
+
+    def __init__(self, store, key, params=None, refresh=False):
+        self.store, self.key, self.params = store, key, dict(params or {})
+        self.entries, self.n_new = {}, 0
+        if refresh: return
+        try:
+            doc = json.loads(store.get(key).decode("utf-8"))
+        except KeyError:
+            return
+        except ValueError as e:
+            print(f"  manifest {store.url(key)} unreadable ({e}); rebuilding")
+            return
+        if doc.get("version") == VERSION and doc.get("params", {}) == json.loads(json.dumps(self.params)):
+            self.entries = doc.get("objects", {})
+        else:
+            print(f"  manifest {store.url(key)} was built with other parameters; rebuilding")
+
+    def changed(self, objects):
+        """Objects that are new or whose ETag/size differ from the manifest."""
+        out = []
+        for o in objects:
+            e = self.entries.get(o["key"])
+            if e is None or e["etag"] != o["etag"] or e["size"] != o["size"]:
+                out.append(o)
+        return out
+
+    def record(self, obj, row):
+        self.entries[obj["key"]] = {"etag": obj["etag"], "size": obj["size"],
+                                    "row": json.loads(json.dumps(row, default=str))}
+        self.n_new += 1
+
+    def rows(self, objects=None):
+        """Rows in listing order; entries for objects no longer listed are dropped from the manifest."""
+        if objects is not None:
+            keys = [o["key"] for o in objects]
+            live = set(keys)
+            self.entries = {k: e for k, e in self.entries.items() if k in live}
+        else:
+            keys = list(self.entries)
+        return [self.entries[k]["row"] for k in keys if k in self.entries]
+
+    def save(self):
+        doc = {"version": VERSION, "params": self.params, "objects": self.entries}
+        self.store.put(self.key, json.dumps(doc, separators=(",", ":")).encode("utf-8"),
+                       content_type="application/json")
@@ -0,0 +1,64 @@
+# result_sink.py
+# In-memory result output for the Glue jobs: each DataFrame is serialised straight to (compressed) bytes
+# and uploaded on a thread pool while the job keeps going; nothing is spilled to /tmp. Large outputs go
+# out as multipart uploads via storage.put.
+#
+#   with ResultSink(open_storage(bucket), f"{prefix}/{location}") as sink:
+#       sink.add(f"{location}_stats8_downscale", df)      # -> <prefix>/<location>/<name>.csv
+#
+# fmt="csv" keeps the object names and contents the merge step and anomaly job read; "csv.gz" and
+# "parquet" are opt-in for consumers that understand them.
+
+import gzip
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+FORMATS = {"csv": "text/csv", "csv.gz": "application/gzip", "parquet": "application/vnd.apache.parquet"}
+
+
+def serialise(df, fmt="csv"):
+    """DataFrame -> bytes in ``fmt`` ("csv", "csv.gz" or "parquet")."""
+    if fmt == "parquet":
+        buf = io.BytesIO()
+        df.to_parquet(buf, index=False)
+        return buf.getvalue()
+    data = df.to_csv(index=False).encode("utf-8")
+    return gzip.compress(data, compresslevel=6, mtime=0) if fmt == "csv.gz" else data
+
+
+class ResultSink:
+    """Queues frames for upload as <prefix>/<name>.<fmt>; ``close`` (or leaving the with block) waits for all."""
+
+    def __init__(self, store, prefix, fmt="csv", workers=None):
+        if fmt not in FORMATS: raise ValueError(f"unknown result format {fmt!r}; use one of {sorted(FORMATS)}")
+        self.store, self.prefix, self.fmt = store, prefix.rstrip("/"), fmt
+        self.pool = ThreadPoolExecutor(max_workers=workers or store.max_workers)
+        self.pending = []
+
+    def _write(self, key, df):
+        self.store.put(key, serialise(df, self.fmt), content_type=FORMATS[self.fmt])
+        return key
+
+    def add(self, name, df):
+        key = f"{self.prefix}/{name}.{self.fmt}"
+        self.pending.append(self.pool.submit(self._write, key, df))
+        return key
+
+    def close(self):
+        try:
+            keys = [f.result() for f in self.pending]
+        finally:
+            self.pool.shutdown()
+        for key in keys:
+            print(f"Uploaded {self.store.url(key)}")
+        print(f"Storage: {self.store.report()}")
+        return keys
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        if exc_type is None:
+            self.close()
+        else:
+            self.pool.shutdown()      # let queued uploads finish, but report the job's own error
@@ -0,0 +1,68 @@
+# s3_inventory.py
+# Read an S3 Inventory report as an object listing, for archives too large to list with ListObjectsV2.
+# Accepts the inventory manifest.json (CSV or Parquet data files, fetched concurrently) or a single
+# inventory data file, and yields the same {"key", "size", "etag", "last_modified"} dicts as storage.list.
+#
+#   for obj in iter_inventory(store, "s3://inventory-bucket/src-bucket/daily/2024-06-01T01-00Z/manifest.json",
+#                             prefix="Constellr_LST/"): ...
+
+import io
+import json
+from urllib.parse import unquote_plus
+
+import pandas as pd
+
+from storage import open_storage
+
+# column order of CSV inventories when there is no manifest.json to read "fileSchema" from
+DEFAULT_SCHEMA = "Bucket, Key, Size, LastModifiedDate, ETag"
+
+
+def _norm(col):
+    # "LastModifiedDate" / "last_modified_date" -> "lastmodifieddate"
+    return col.strip().lower().replace("_", "")
+
+def _read_part(key, data, fmt, schema):
+    if fmt == "parquet":
+        df = pd.read_parquet(io.BytesIO(data))
+    else:
+        names = [c.strip() for c in schema.split(",")]
+        df = pd.read_csv(io.BytesIO(data), header=None, names=names, dtype=str, keep_default_na=False,
+                         compression="gzip" if key.endswith(".gz") else None)
+    df.columns = [_norm(c) for c in df.columns]
+    if fmt != "parquet":
+        df["key"] = df["key"].map(unquote_plus)          # CSV inventories URL-encode the keys
+    return df
+
+def _truthy(s):
+    return s.astype(str).str.lower().isin(["true", "1"])
+
+def iter_inventory(store, location, prefix=""):
+    """Objects under ``prefix`` from the inventory at ``location`` (s3://bucket/key, or a key in ``store``)."""
+    if location.startswith("s3://"):
+        bucket, _, key = location[len("s3://"):].partition("/")
+        store = open_storage(bucket, store.max_workers)
+    else:
+        key = location
+
+    if key.endswith("manifest.json"):
+        man = json.loads(store.get(key).decode("utf-8"))
+        fmt = man.get("fileFormat", "CSV").lower()
+        schema = man.get("fileSchema", DEFAULT_SCHEMA)
+        parts = [f["key"] for f in man.get("files", [])]
+    else:
+        fmt = "parquet" if key.endswith(".parquet") else "csv"
+        schema, parts = DEFAULT_SCHEMA, [key]
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"unsupported inventory format {fmt!r} (use CSV or Parquet)")
+
+    for part_key, data in store.get_many(parts):
+        df = _read_part(part_key, data, fmt, schema)
+        if prefix: df = df[df["key"].str.startswith(prefix)]
+        if "isdeletemarker" in df: df = df[~_truthy(df["isdeletemarker"])]
+        if "islatest" in df: df = df[_truthy(df["islatest"])]
+        size = pd.to_numeric(df["size"], errors="coerce").fillna(0).astype("int64") if "size" in df else 0
+        etag = df["etag"].astype(str).str.strip('"') if "etag" in df else ""
+        modified = df["lastmodifieddate"] if "lastmodifieddate" in df else None
+        out = pd.DataFrame({"key": df["key"], "size": size, "etag": etag, "last_modified": modified})
+        yield from out.sort_values("key", kind="mergesort").to_dict("records")
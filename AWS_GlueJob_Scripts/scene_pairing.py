@@ -0,0 +1,54 @@
+# scene_pairing.py
+# Landsat 8/9 <-> Sentinel-2 scene pairing by acquisition date, and the model queue that runs the
+# downscaling model once per pair. Pure Python (no Earth Engine session needed), so it can be
+# benchmarked and reused by recent_collections and the Glue jobs.
+
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+MAX_DATE_DIFF = 7       # days between a Landsat and an S2 acquisition for a pair (0 = no limit)
+MODEL_WORKERS = 4       # concurrent model() calls; each spends most of its time blocked in getInfo
+
+def _date_of(img_id, sensor):
+    # Landsat ids end in _YYYYMMDD; S2 ids are COPERNICUS/<collection>/YYYYMMDDT...
+    s = img_id.split('/')[2][0:8] if sensor == 'S2' else img_id.split('_')[-1]
+    return datetime.strptime(s, '%Y%m%d').date()
+
+def pair_scenes(landsat8, landsat9, copernicus, max_date_diff=MAX_DATE_DIFF):
+    """Sensor-tagged (sensor, landsat_id, s2_id) pairs from one sort-merge pass over both missions.
+
+    Same pairs as the former per-mission loops: every S2 scene against every Landsat scene less than
+    ``max_date_diff`` days away, using the first id of each acquisition date; ordered per sensor by
+    S2 position, then Landsat position.
+    """
+    first, scenes = {}, []
+    for sensor, ids in (('L8', landsat8), ('L9', landsat9)):
+        for pos, img in enumerate(ids):
+            d = _date_of(img, sensor)
+            scenes.append((d, sensor, pos, first.setdefault((sensor, d), img)))
+    scenes.sort()
+    dates = [t[0] for t in scenes]
+    window = timedelta(days=max_date_diff)
+
+    pairs = []
+    for c_pos, c_img in enumerate(copernicus):
+        c = _date_of(c_img, 'S2')
+        c_img = first.setdefault(('S2', c), c_img)
+        lo, hi = (bisect_right(dates, c - window), bisect_left(dates, c + window)) if max_date_diff else (0, len(dates))
+        pairs += [(sensor, c_pos, pos, img, c_img) for _, sensor, pos, img in scenes[lo:hi]]
+    pairs.sort(key=lambda t: t[:3])
+    return [(sensor, img, c_img) for sensor, _, _, img, c_img in pairs]
+
+def run_model_queue(pairs, model_fn, extent, workers=MODEL_WORKERS):
+    """Run ``model_fn(landsat_id, s2_id, extent)`` once per distinct pair of the unified list and split
+    the results per sensor: {sensor: ([downscale rows], [normal rows])} in pair order."""
+    unique = list(dict.fromkeys((l, c) for _, l, c in pairs))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        results = dict(zip(unique, ex.map(lambda lc: model_fn(lc[0], lc[1], extent), unique)))
+    out = {}
+    for sensor, l, c in pairs:
+        down, normal = results[(l, c)]
+        rows = out.setdefault(sensor, ([], []))
+        rows[0].append(down); rows[1].append(normal)
+    return out
@@ -0,0 +1,229 @@
+# storage.py
+# Object storage for the Glue jobs: an S3 backend over one pooled client, and a local-directory backend
+# with the same interface so the jobs can run (and be benchmarked) on a laptop against a stand-in tree.
+#
+#   store = open_storage("my-bucket")            # or "s3://my-bucket", "file:///tmp/standin", "./standin"
+#   for obj in store.list("Constellr_LST/"): ...
+#   data = store.get(key); store.put(key, data)
+#   print(store.report())                        # requests / MB in / MB out / MB/s since creation
+
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+MAX_WORKERS = int(os.environ.get("STORAGE_MAX_WORKERS", "16"))
+MULTIPART_THRESHOLD = 64 * 1024 * 1024     # in-memory puts above this go out as concurrent multipart parts
+PART_SIZE = 16 * 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def s3_client(max_pool=MAX_WORKERS):
+    """One pooled, thread-safe S3 client per pool size, shared by every S3Storage in the process."""
+    import boto3
+    from botocore.config import Config
+    return boto3.client("s3", config=Config(max_pool_connections=max(10, 2 * max_pool),
+                                            retries={"max_attempts": 5, "mode": "standard"}))
+
+
+class _Storage:
+    """Shared counters + concurrent helpers; backends implement list/list_prefixes/head/get/put/url."""
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self.reset_counters()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests, self.bytes_in, self.bytes_out, self.t0 = 0, 0, 0, time.perf_counter()
+
+    def _count(self, n_in=0, n_out=0):
+        with self._lock:
+            self.requests += 1; self.bytes_in += n_in; self.bytes_out += n_out
+
+    def report(self):
+        dt = max(time.perf_counter() - self.t0, 1e-9)
+        mb_in, mb_out = self.bytes_in / 1e6, self.bytes_out / 1e6
+        return (f"{self.requests} requests, {mb_in:.1f} MB in, {mb_out:.1f} MB out in {dt:.1f} s "
+                f"({(mb_in + mb_out) / dt:.1f} MB/s)")
+
+    def get_many(self, keys, workers=None):
+        """Yield (key, bytes) in input order, fetching up to ``workers`` objects at a time."""
+        with ThreadPoolExecutor(max_workers=workers or self.max_workers) as ex:
+            yield from zip(keys, ex.map(self.get, keys))
+
+    def put_many(self, items, workers=None):
+        """Upload {key: bytes} (or (key, bytes) pairs) concurrently; returns the keys written."""
+        items = list(items.items() if isinstance(items, dict) else items)
+        with ThreadPoolExecutor(max_workers=workers or self.max_workers) as ex:
+            list(ex.map(lambda kv: self.put(*kv), items))
+        return [k for k, _ in items]
+
+    def upload_files(self, paths, prefix, workers=None):
+        """Upload local files as <prefix>/<basename>; returns the keys written."""
+        pairs = [(p, f"{prefix.rstrip('/')}/{os.path.basename(p)}") for p in paths]
+        with ThreadPoolExecutor(max_workers=workers or self.max_workers) as ex:
+            list(ex.map(lambda pk: self.upload_file(*pk), pairs))
+        return [k for _, k in pairs]
+
+    def upload_file(self, path, key):
+        with open(path, "rb") as f:
+            self.put(key, f.read())
+
+
+class S3Storage(_Storage):
+    def __init__(self, bucket, max_workers=MAX_WORKERS, client=None):
+        super().__init__(max_workers)
+        self.bucket = bucket
+        self.client = client or s3_client(max_workers)
+
+    def url(self, key):
+        return f"s3://{self.bucket}/{key}"
+
+    def list(self, prefix=""):
+        """Yield {"key", "size", "etag", "last_modified"} for every object under ``prefix``."""
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            self._count()
+            for o in page.get("Contents", []):
+                yield {"key": o["Key"], "size": o["Size"], "etag": o["ETag"].strip('"'),
+                       "last_modified": o["LastModified"]}
+
+    def list_prefixes(self, prefix="", delimiter="/"):
+        out = []
+        for page in self.client.get_paginator("list_objects_v2").paginate(
+                Bucket=self.bucket, Prefix=prefix, Delimiter=delimiter):
+            self._count()
+            out += [cp["Prefix"] for cp in page.get("CommonPrefixes", [])]
+        return out
+
+    def head(self, key):
+        """{"size", "etag", "metadata"} or None if the object does not exist."""
+        from botocore.exceptions import ClientError
+        try:
+            h = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError:
+            return None
+        finally:
+            self._count()
+        return {"size": h["ContentLength"], "etag": h["ETag"].strip('"'), "metadata": h.get("Metadata", {})}
+
+    def get(self, key, byte_range=None):
+        """Object bytes; ``byte_range`` = (start, end) inclusive for a ranged GET. KeyError if missing."""
+        kw = {"Range": f"bytes={byte_range[0]}-{byte_range[1]}"} if byte_range else {}
+        try:
+            data = self.client.get_object(Bucket=self.bucket, Key=key, **kw)["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            self._count()
+            raise KeyError(key)
+        self._count(n_in=len(data))
+        return data
+
+    def put(self, key, data, content_type=None, metadata=None):
+        kw = {}
+        if content_type: kw["ContentType"] = content_type
+        if metadata: kw["Metadata"] = metadata
+        if len(data) > MULTIPART_THRESHOLD:
+            # managed multipart straight from memory; parts upload in parallel
+            from boto3.s3.transfer import TransferConfig
+            cfg = TransferConfig(multipart_threshold=MULTIPART_THRESHOLD, multipart_chunksize=PART_SIZE,
+                                 max_concurrency=self.max_workers)
+            self.client.upload_fileobj(io.BytesIO(data), self.bucket, key, ExtraArgs=kw, Config=cfg)
+        else:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **kw)
+        self._count(n_out=len(data))
+
+    def upload_file(self, path, key):
+        self.client.upload_file(path, self.bucket, key)     # managed (multipart) transfer
+        self._count(n_out=os.path.getsize(path))
+
+
+class LocalStorage(_Storage):
+    """Directory tree standing in for a bucket; keys map to relative paths."""
+
+    def __init__(self, root, max_workers=MAX_WORKERS):
+        super().__init__(max_workers)
+        self.root = os.path.abspath(root)
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def url(self, key):
+        return f"file://{self._path(key)}"
+
+    @staticmethod
+    def _etag(st):
+        # cheap change tag (size + mtime) in place of S3's content MD5
+        return hashlib.md5(f"{st.st_size}-{st.st_mtime_ns}".encode()).hexdigest()
+
+    def list(self, prefix=""):
+        self._count()
+        base = os.path.dirname(self._path(prefix)) if not prefix.endswith("/") else self._path(prefix)
+        if not os.path.isdir(base): return
+        for dirpath, dirs, files in os.walk(base):
+            dirs.sort()
+            for fn in sorted(files):
+                if fn.endswith((".meta", ".tmp")): continue       # sidecars and in-flight writes
+                p = os.path.join(dirpath, fn)
+                key = os.path.relpath(p, self.root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    st = os.stat(p)
+                    yield {"key": key, "size": st.st_size, "etag": self._etag(st), "last_modified": st.st_mtime}
+
+    def list_prefixes(self, prefix="", delimiter="/"):
+        self._count()
+        base = self._path(prefix)
+        if not os.path.isdir(base): return []
+        return [f"{prefix}{e.name}{delimiter}" for e in sorted(os.scandir(base), key=lambda e: e.name) if e.is_dir()]
+
+    def head(self, key):
+        self._count()
+        p = self._path(key)
+        if not os.path.isfile(p): return None
+        meta = {}
+        if os.path.exists(p + ".meta"):
+            with open(p + ".meta") as f:
+                meta = dict(line.rstrip("\n").split("=", 1) for line in f if "=" in line)
+        st = os.stat(p)
+        return {"size": st.st_size, "etag": self._etag(st), "metadata": meta}
+
+    def get(self, key, byte_range=None):
+        try:
+            with open(self._path(key), "rb") as f:
+                if byte_range:
+                    f.seek(byte_range[0])
+                    data = f.read(byte_range[1] - byte_range[0] + 1)
+                else:
+                    data = f.read()
+        except FileNotFoundError:
+            self._count()
+            raise KeyError(key)
+        self._count(n_in=len(data))
+        return data
+
+    def put(self, key, data, content_type=None, metadata=None):
+        p = self._path(key)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, p)
+        if metadata:
+            with open(p + ".meta", "w") as f:
+                f.writelines(f"{k}={v}\n" for k, v in metadata.items())
+        elif os.path.exists(p + ".meta"):
+            os.remove(p + ".meta")        # S3 replaces metadata on every put; so does the stand-in
+        self._count(n_out=len(data))
+
+
+def open_storage(location, max_workers=MAX_WORKERS):
+    """S3Storage for "s3://bucket" or a bare bucket name; LocalStorage for "file://dir", "/dir", "./dir"
+    or a Windows path ("C:\\dir", "..\\dir")."""
+    if location.startswith("file://"):
+        return LocalStorage(location[len("file://"):], max_workers)
+    if location.startswith(("/", "./", "../", ".\\", "..\\", "\\")) or (len(location) > 1 and location[1] == ":"):
+        return LocalStorage(location, max_workers)
+    return S3Storage(location[len("s3://"):].strip("/") if location.startswith("s3://") else location, max_workers)
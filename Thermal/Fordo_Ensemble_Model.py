@@ -5,16 +5,15 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from scipy.stats import genpareto
 import warnings
-import glob
+from functools import lru_cache
 
-# Optional rasters
-try:
-    import rasterio
-    RASTER_OK = True
-except Exception:
-    RASTER_OK = False
+from raster_stats import scene_metrics_parallel
+from baselines import attach_baselines, baseline_table, robust_z
+from evt_store import TailModelStore, tail_quantiles
+from scoring import build_scoring_tables, save_scoring_tables
+from table_cache import read_table_cached
+from raster_index import ConstellrRasterIndex
 
 #  USER INPUTS 
 LANDSAT_XLS    = "D:/Dissertation-2542000/RP3/Thermal/Fordo_landsattabledata_updated.xlsx"    # 2015–2022
@@ -29,6 +28,9 @@ FORDO_DIR      = "D:/Dissertation-2542000/Fordo"
 CONSTELLR_LST_COL   = "lst_path"
 CONSTELLR_CLOUD_COL = "cloudmask_path"
 CONSTELLR_NODATA    = 65535
+SCENE_WORKERS       = None   # process pool size for raster metrics (None = all cores)
+TABLE_CACHE_DIR     = "./.table_cache"   # Feather copies of the Excel tables (keyed by path/mtime/size)
+RASTER_INDEX_JSON   = "./fordo_constellr_raster_index.json"   # persisted FORDO_DIR folder index
 
 # Normalization
 RENAME_MAP = {
@@ -39,6 +41,7 @@ RENAME_MAP = {
     "mintemp": "lst_min",
     "diff_from_mean": "diff_from_mean",
 }
+DATE_COLS = ["date", "date_s2"]   # parsed (and cached typed) by read_table_cached; after RENAME_MAP
 
 # Train windows (no Constellr training)
 SPLITS = {
@@ -64,6 +67,10 @@ BASELINE_GROUPS = {
 Z_THRESHOLD     = 3.0
 Z_GAP_THRESHOLD = 3.0
 USE_EVT         = True
+EVT_STORE       = "./fordo_evt_tail_models.csv"   # persisted GPD fits, refit only when train data changes
+EVT_METHOD      = "mle"   # "mle" (per-group fit), "pwm+mle", or "pwm" (batched closed form; check
+                          # flag parity with bench_gpd_fit.py before switching)
+SCORING_TABLES  = "./fordo_scoring_tables.json"   # loaded by scoring.py for per-scene scoring
 
 
 _to_dt = lambda x: pd.to_datetime(x, errors="coerce")
@@ -77,59 +84,27 @@ def _month(x):
     try: return _to_dt(x).month
     except: return np.nan
 
-def _date_folder(base_dir, dt):
-    d = _to_dt(dt)
-    return Path(base_dir) / f"{d.day:02d}-{d.month:02d}-{d.year:04d}"
-
-def _first_match(patterns):
-    for p in patterns:
-        hits = sorted(glob.glob(p))
-        if hits: return hits[0]
-    return None
+@lru_cache(maxsize=1)
+def _raster_index():
+    # FORDO_DIR is walked once per run (new/changed folders only, see raster_index.py)
+    return ConstellrRasterIndex(FORDO_DIR, RASTER_INDEX_JSON)
 
 def find_constellr_paths_for_date(obs_date):
-    folder = _date_folder(FORDO_DIR, obs_date)
-    if not folder.exists(): return (None, None)
-    lst   = _first_match([str(folder/"*lst.tif"), str(folder/"*lst.tiff"), str(folder/"*_lst.tif*")])
-    cloud = _first_match([
-        str(folder/"*cloud_mask.tif"), str(folder/"*cloud_mask.tiff"),
-        str(folder/"*cloud_mask*.tif*"), str(folder/"*cloud_mask.png"),
-        str(folder/"*cloud_mask.jpg"), str(folder/"*cloud_mask.jpeg"),
-    ])
-    return (lst, cloud)
-
-def p95_minus_median_from_raster(lst_path, cloudmask_path=None, nodata=None):
-    if not RASTER_OK or not lst_path or not Path(lst_path).exists(): return np.nan
-    with rasterio.open(lst_path) as src:
-        a = src.read(1).astype("float32")
-        nd = src.nodata if nodata is None else nodata
-        if nd is not None: a = np.where(a == nd, np.nan, a)
-    if cloudmask_path and Path(cloudmask_path).exists():
-        try:
-            with rasterio.open(cloudmask_path) as m: cm = m.read(1)
-            a = np.where((cm != 0) | ~np.isfinite(a), np.nan, a)
-        except Exception:
-            pass
-    if not np.isfinite(a).any(): return np.nan
-    return float(np.nanpercentile(a, 95) - np.nanmedian(a))
+    return _raster_index().lookup(obs_date)
 
 # 1) Load 
 def load_and_unify():
     dfs = []
 
     if Path(LANDSAT_XLS).exists():
-        l8 = pd.read_excel(LANDSAT_XLS)
-        l8.columns = [c.strip().lower().replace(" ","_") for c in l8.columns]
-        l8 = l8.rename(columns={k:v for k,v in RENAME_MAP.items() if k in l8.columns})
+        l8 = read_table_cached(LANDSAT_XLS, RENAME_MAP, TABLE_CACHE_DIR, DATE_COLS)
         if "date" not in l8.columns and "date_s2" in l8.columns: l8["date"] = l8["date_s2"]
         l8["date"] = _to_dt(l8["date"])
         l8["sensor"] = "landsat"
         dfs.append(l8)
 
     if Path(DOWNSCALED_XLS).exists():
-        ds = pd.read_excel(DOWNSCALED_XLS)
-        ds.columns = [c.strip().lower().replace(" ","_") for c in ds.columns]
-        ds = ds.rename(columns={k:v for k,v in RENAME_MAP.items() if k in ds.columns})
+        ds = read_table_cached(DOWNSCALED_XLS, RENAME_MAP, TABLE_CACHE_DIR, DATE_COLS)
         if "date" not in ds.columns or ds["date"].isna().all():
             ds["date"] = _to_dt(ds.get("date_s2", np.nan))
         else:
@@ -138,9 +113,7 @@ def load_and_unify():
         dfs.append(ds)
 
     if Path(CONSTELLR_XLS).exists():
-        cs = pd.read_excel(CONSTELLR_XLS)
-        cs.columns = [c.strip().lower().replace(" ","_") for c in cs.columns]
-        cs = cs.rename(columns={k:v for k,v in RENAME_MAP.items() if k in cs.columns})
+        cs = read_table_cached(CONSTELLR_XLS, RENAME_MAP, TABLE_CACHE_DIR, DATE_COLS)
         if "date" not in cs.columns:
             dcols = [c for c in cs.columns if "date" in c]
             if dcols: cs["date"] = _to_dt(cs[dcols[0]])
@@ -220,27 +193,18 @@ def compute_scene_metrics(df):
     if cons.any():
         # Use provided path columns if present; else resolve from folders
         if CONSTELLR_LST_COL in df.columns:
-            it = df.loc[cons, [CONSTELLR_LST_COL, CONSTELLR_CLOUD_COL]].itertuples(index=True, name=None)
-            for idx, lst_p, cloud_p in it:
-                v = p95_minus_median_from_raster(lst_p, cloud_p, CONSTELLR_NODATA)
-                if np.isfinite(v): df.at[idx, "delt_rob"] = v
+            pairs = list(df.loc[cons, [CONSTELLR_LST_COL, CONSTELLR_CLOUD_COL]].itertuples(index=False, name=None))
         else:
-            for idx, row in df.loc[cons].iterrows():
-                lst_p, cloud_p = find_constellr_paths_for_date(row["obs_date"])
-                v = p95_minus_median_from_raster(lst_p, cloud_p, CONSTELLR_NODATA)
-                if np.isfinite(v): df.at[idx, "delt_rob"] = v
+            pairs = [find_constellr_paths_for_date(d) for d in df.loc[cons, "obs_date"]]
+        vals = pd.Series(scene_metrics_parallel(pairs, CONSTELLR_NODATA, SCENE_WORKERS),
+                         index=df.index[cons], dtype=float)
+        vals = vals[np.isfinite(vals)]
+        df.loc[vals.index, "delt_rob"] = vals
     return df
 
 #  Robust baselines by baseline_group 
 def robust_baseline(df, col="delt_rob"):
-    base = (df[df["is_train"]]
-            .groupby(["baseline_group","month"])[col]
-            .agg(med=lambda s: s.median(skipna=True),
-                 mad=lambda s: (s - s.median(skipna=True)).abs().median(skipna=True))
-            .reset_index()
-            .rename(columns={"med":f"{col}_median_train","mad":f"{col}_mad_train"}))
-    df = df.merge(base, on=["baseline_group","month"], how="left")
-    df[f"z_{col}"] = (df[col] - df[f"{col}_median_train"]) / (1.4826*(df[f"{col}_mad_train"] + 1e-9))
+    df = attach_baselines(df, df["is_train"], [col])
     df["robust_z_flag"] = df[f"z_{col}"] >= Z_THRESHOLD
     return df
 
@@ -252,40 +216,20 @@ def weather_gap(df):
         return df
     df = df.copy()
     df["lst_air_gap"] = df["lst_max"] - df["air_tmax_c_used"]
-    gap_base = (df[df["is_train"] & df["lst_air_gap"].notna()]
-                .groupby(["baseline_group","month"])["lst_air_gap"]
-                .agg(med=lambda s: s.median(skipna=True),
-                     mad=lambda s: (s - s.median(skipna=True)).abs().median(skipna=True))
-                .reset_index()
-                .rename(columns={"med":"gap_med_train","mad":"gap_mad_train"}))
+    gap_base = (baseline_table(df[df["is_train"] & df["lst_air_gap"].notna()], ["lst_air_gap"])
+                .rename(columns={"lst_air_gap_median_train":"gap_med_train",
+                                 "lst_air_gap_mad_train":"gap_mad_train"}))
     df = df.merge(gap_base, on=["baseline_group","month"], how="left")
-    df["z_gap"] = (df["lst_air_gap"] - df["gap_med_train"]) / (1.4826*(df["gap_mad_train"] + 1e-9))
+    df["z_gap"] = robust_z(df["lst_air_gap"], df["gap_med_train"], df["gap_mad_train"])
     df["weather_norm_flag"] = df["z_gap"] >= Z_GAP_THRESHOLD
     return df
 
 #  7) EVT tail modeling 
 def evt_tail_flag(df, col="delt_rob", p_body=0.95, target_q=0.99):
     df = df.copy()
-    thr = (df[df["is_train"]]
-           .groupby(["baseline_group","month"])[col]
-           .quantile(p_body).rename("u_thr").reset_index())
-    df = df.merge(thr, on=["baseline_group","month"], how="left")
-
-    thresholds = []
-    for (grp, month), g in df[df["is_train"]].groupby(["baseline_group","month"]):
-        u = g["u_thr"].iloc[0]
-        x = g[col].dropna()
-        exc = (x - u)[x > u]
-        if len(exc) >= 30:
-            c, loc, scale = genpareto.fit(exc, floc=0)
-            p = (target_q - p_body) / (1 - p_body)
-            yq = (-scale*np.log(1-p)) if abs(c) < 1e-6 else (scale/c)*((1-p)**(-c) - 1)
-            q_abs = u + yq
-        else:
-            q_abs = np.nan
-        thresholds.append({"baseline_group": grp, "month": month, f"{col}_evt_q": q_abs})
-
-    qtab = pd.DataFrame(thresholds)
+    store = TailModelStore(EVT_STORE)
+    qtab = tail_quantiles(df[df["is_train"]], col, store, p_body=p_body, target_q=target_q,
+                          method=EVT_METHOD)
     df = df.merge(qtab, on=["baseline_group","month"], how="left")
     df["evt_tail_flag"] = (df[col] > df[f"{col}_evt_q"]).fillna(False)
     return df
@@ -311,6 +255,8 @@ def main():
     if USE_EVT:
         df = evt_tail_flag(df, col="delt_rob", p_body=0.95, target_q=0.99)
     df = final_score(df)
+    save_scoring_tables(build_scoring_tables(df, Z_THRESHOLD, Z_GAP_THRESHOLD, BASELINE_GROUPS),
+                        SCORING_TABLES)
 
     
     df.sort_values(["obs_date","sensor"]).to_csv("./fordo_anomaly_table_full.csv", index=False)
@@ -320,6 +266,7 @@ def main():
 
     print("Saved: ./fordo_anomaly_table_full.csv")
     print("Saved: ./fordo_anomaly_eval_2025plus.csv")
+    print(f"Saved: {SCORING_TABLES}")
     print("\nEVAL-ONLY (Downscaled & Constellr after 2025):")
     print(df_eval.groupby("sensor")["decision"].value_counts(dropna=False))
 
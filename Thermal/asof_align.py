@@ -0,0 +1,45 @@
+# asof_align.py
+# Tolerance-based alignment of per-sensor ΔT tables into one row per observation event.
+# Frames are folded in priority order: each sensor's observations are matched to the nearest existing
+# event within the tolerance (sorted merge_asof, O(n log n)); unmatched observations open new events.
+
+import pandas as pd
+
+
+def align_asof(frames, tolerance_days=1.0, date_col="Date"):
+    """Align ``frames`` ({sensor: df with ``date_col`` + value columns}) into one row per event.
+
+    The first frame anchors event dates. Each event holds at most one observation per sensor (the nearest),
+    and ``<sensor>_gap_days`` is that observation's date minus the event date. Rows with no date are dropped.
+    """
+    tol = pd.Timedelta(days=tolerance_days)
+    events, obs_cols = None, {}
+    for name, f in frames.items():
+        obs = f"_{name}_date"
+        obs_cols[name] = obs
+        f = f.assign(**{date_col: pd.to_datetime(f[date_col], errors="coerce").astype("datetime64[ns]")})
+        f = (f[f[date_col].notna()].sort_values(date_col, kind="mergesort")
+               .rename(columns={date_col: obs}).reset_index(drop=True))
+        if events is None:
+            events = f.assign(**{date_col: f[obs]})
+            continue
+
+        # nearest event for every observation, then keep only the nearest observation per event
+        left = f[[obs]].rename_axis("_obs").reset_index()
+        right = events[[date_col]].rename_axis("_event").reset_index()
+        m = pd.merge_asof(left, right, left_on=obs, right_on=date_col, direction="nearest", tolerance=tol)
+        m = m[m["_event"].notna()]
+        m = (m.assign(_gap=(m[obs] - m[date_col]).abs())
+               .sort_values(["_event", "_gap"], kind="mergesort").drop_duplicates("_event"))
+
+        matched = f.loc[m["_obs"].to_numpy()].set_axis(m["_event"].astype(int).to_numpy())
+        rest = f.drop(index=m["_obs"].to_numpy())
+        events = pd.concat([events.join(matched), rest.assign(**{date_col: rest[obs]})], ignore_index=True)
+        events = events.sort_values(date_col, kind="mergesort").reset_index(drop=True)
+
+    if events is None:
+        return pd.DataFrame(columns=[date_col])
+    for name, obs in obs_cols.items():
+        events[f"{name}_gap_days"] = (events[obs] - events[date_col]).dt.total_seconds() / 86400.0
+    events = events.drop(columns=list(obs_cols.values()))
+    return events[[date_col] + [c for c in events.columns if c != date_col]]
@@ -0,0 +1,100 @@
+# backtest.py
+# Threshold backtesting over the ensemble parameters on a scored ensemble table
+# (e.g. zap_anomaly_table_full.csv). z-scores come from the table and EVT levels are fitted once per
+# (p_body, target_q); every (Z_THRESHOLD, Z_GAP_THRESHOLD, p_body/target_q, decision rule) combination
+# is then evaluated with broadcast comparisons, and flag counts are summed per sensor and period.
+#
+#   python backtest.py zap_anomaly_table_full.csv --z 2,2.5,3,3.5,4 --zgap 2,2.5,3,3.5,4 \
+#       --p_body 0.9,0.95 --target_q 0.99,0.995 --out zap_backtest_grid.csv
+
+import argparse, itertools, time
+import numpy as np
+import pandas as pd
+
+from gpd_batch import fit_tails
+
+KEYS = ["baseline_group", "month"]
+
+
+def evt_levels(df, col, evt_grid, method="mle"):
+    """(n_rows x n_evt) EVT levels, one column per (p_body, target_q), fitted on ``is_train`` rows."""
+    train = df[df["is_train"].astype(bool)]
+    groups = {k: g[col].dropna().to_numpy(dtype="float64") for k, g in train.groupby(KEYS)}
+    keys = pd.MultiIndex.from_tuples(list(groups), names=KEYS)
+    row_pos = keys.get_indexer(pd.MultiIndex.from_frame(df[KEYS]))       # -1 where no train group
+    out = np.full((len(df), len(evt_grid)), np.nan)
+    for j, (p_body, target_q) in enumerate(evt_grid):
+        q = np.array([r["evt_q"] for r in fit_tails(list(groups.values()), p_body, target_q, method)] + [np.nan])
+        out[:, j] = q[row_pos]
+    return out
+
+def run_grid(df, z_grid, zgap_grid, evt_grid, min_scores=(2,), period="year",
+             col="delt_rob", z_col="z_delt_rob", zgap_col="z_gap", method="mle"):
+    """Flag counts for every parameter combination, per sensor and period (long format)."""
+    df = df.reset_index(drop=True)
+    per = pd.to_datetime(df["obs_date"]).dt.year if period == "year" else df[period]
+    cell = pd.MultiIndex.from_arrays([df["sensor"], per], names=["sensor", "period"])
+    codes, cells = pd.factorize(cell)
+    onehot = np.zeros((len(cells), len(df)), dtype=np.float32)
+    onehot[codes, np.arange(len(df))] = 1.0                               # rows -> (sensor, period) cells
+
+    z = df[z_col].to_numpy(dtype="float64")
+    zg = df[zgap_col].to_numpy(dtype="float64") if zgap_col in df.columns else np.full(len(df), np.nan)
+    x = df[col].to_numpy(dtype="float64")
+    zt, gt = np.asarray(z_grid, dtype="float64"), np.asarray(zgap_grid, dtype="float64")
+
+    robust = (z[:, None] >= zt[None, :]).astype(np.int8)                 # n x A
+    weather = (zg[:, None] >= gt[None, :]).astype(np.int8)               # n x B
+    evt = (x[:, None] > evt_levels(df, col, evt_grid, method)).astype(np.int8)   # n x C
+
+    score = robust[:, :, None, None] + weather[:, None, :, None] + evt[:, None, None, :]   # n x A x B x C
+    flat = score.reshape(len(df), -1)
+    count = lambda m: (onehot @ m.astype(np.float32)).astype(np.int64)    # cells x combos
+
+    res = {"robust_z_flag": count(np.broadcast_to(robust[:, :, None, None], score.shape).reshape(len(df), -1)),
+           "weather_norm_flag": count(np.broadcast_to(weather[:, None, :, None], score.shape).reshape(len(df), -1)),
+           "evt_tail_flag": count(np.broadcast_to(evt[:, None, None, :], score.shape).reshape(len(df), -1))}
+    n_rows = onehot.sum(axis=1).astype(np.int64)
+
+    combos = list(itertools.product(zt, gt, evt_grid))
+    frames = []
+    for k in min_scores:
+        inv = count(flat >= k)
+        low = count((flat >= 1) & (flat < k))
+        for j, (a, b, (pb, tq)) in enumerate(combos):
+            frames.append(pd.DataFrame({
+                "z_threshold": a, "z_gap_threshold": b, "p_body": pb, "target_q": tq, "investigate_min_score": k,
+                "sensor": cells.get_level_values(0), "period": cells.get_level_values(1), "n_rows": n_rows,
+                "robust_z_flag": res["robust_z_flag"][:, j], "weather_norm_flag": res["weather_norm_flag"][:, j],
+                "evt_tail_flag": res["evt_tail_flag"][:, j], "investigate": inv[:, j], "low_interest": low[:, j],
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+def _floats(s):
+    return [float(v) for v in s.split(",") if v.strip()]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("table")
+    ap.add_argument("--z", default="2,2.5,3,3.5,4")
+    ap.add_argument("--zgap", default="2,2.5,3,3.5,4")
+    ap.add_argument("--p_body", default="0.9,0.95")
+    ap.add_argument("--target_q", default="0.99,0.995")
+    ap.add_argument("--min_score", default="1,2,3")      # final_score rule: investigate if score >= k
+    ap.add_argument("--period", default="year")          # "year" or a column of the table (e.g. is_eval)
+    ap.add_argument("--method", default="mle")           # EVT fit; same default as EVT_METHOD in the ensemble scripts
+    ap.add_argument("--out", default="./backtest_grid.csv")
+    a = ap.parse_args()
+
+    df = pd.read_csv(a.table, parse_dates=["obs_date"])
+    evt_grid = [(pb, tq) for pb in _floats(a.p_body) for tq in _floats(a.target_q) if tq > pb]
+    t0 = time.perf_counter()
+    out = run_grid(df, _floats(a.z), _floats(a.zgap), evt_grid,
+                   min_scores=[int(k) for k in _floats(a.min_score)], period=a.period, method=a.method)
+    n_cfg = len(out) // max(out.groupby(["sensor", "period"]).ngroups, 1)
+    print(f"{n_cfg} configurations x {len(df)} rows in {time.perf_counter() - t0:.2f} s")
+    out.to_csv(a.out, index=False)
+    print(f"Saved: {a.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# baselines.py
+# Robust (median / MAD) baselines per (baseline_group, month), vectorised over several metric columns.
+
+import pandas as pd
+
+BASELINE_KEYS = ["baseline_group", "month"]
+MAD_SCALE     = 1.4826
+
+
+def baseline_table(train, cols, keys=BASELINE_KEYS):
+    """Median and MAD of each column in ``cols`` per group (NaNs skipped).
+
+    Returns one row per group with ``<col>_median_train`` and ``<col>_mad_train``.
+    """
+    cols, keys = list(cols), list(keys)
+    g = train.groupby(keys)[cols]
+    med = g.median()
+    # broadcast group medians back to rows, then one more native median for the MAD
+    dev = (train[cols] - g.transform("median")).abs()
+    mad = dev.groupby([train[k] for k in keys]).median()
+    out = pd.concat([med.add_suffix("_median_train"), mad.add_suffix("_mad_train")], axis=1)
+    return out.reset_index()
+
+def robust_z(x, med, mad):
+    return (x - med) / (MAD_SCALE * (mad + 1e-9))
+
+def attach_baselines(df, train_mask, cols, keys=BASELINE_KEYS):
+    """Merge train baselines for ``cols`` onto ``df`` and add ``z_<col>`` for each."""
+    base = baseline_table(df[train_mask], cols, keys)
+    df = df.merge(base, on=list(keys), how="left")
+    for c in cols:
+        df[f"z_{c}"] = robust_z(df[c], df[f"{c}_median_train"], df[f"{c}_mad_train"])
+    return df
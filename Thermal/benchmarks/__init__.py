@@ -0,0 +1,14 @@
+# benchmarks
+# Synthetic-input benchmarks for the thermal pipeline (scene pairing, ensemble screening and scoring,
+# Constellr raster statistics, EVT tail fits) at several scales, recorded as JSON.
+#
+#   cd Thermal && python -m benchmarks --scales small,medium --out bench_results.json
+#   python -m benchmarks --scales small --compare bench_results.json     # ratios vs an earlier run
+
+import os
+import sys
+
+# the pipeline modules are flat files in Thermal/
+_THERMAL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _THERMAL not in sys.path:
+    sys.path.insert(0, _THERMAL)
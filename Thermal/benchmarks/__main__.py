@@ -0,0 +1,75 @@
+# python -m benchmarks [--stages pairing,screening,...] [--scales small,medium] [--repeat 3]
+#                      [--out bench_results.json] [--compare earlier.json] [--tolerance 0.2]
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stages import SCALES, STAGES, to_json
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+def meta():
+    return {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "git": _git_rev(),
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count()}
+
+def compare(results, path, tolerance):
+    """Print median-time ratios against an earlier results file; returns the number of regressions."""
+    with open(path) as f: old = json.load(f)
+    ref = {(r["stage"], r["scale"], r["case"]): r for r in old["results"]}
+    print(f"\nvs {path} ({old['meta'].get('git')}, {old['meta'].get('timestamp')})")
+    slower = 0
+    for r in results:
+        o = ref.get((r["stage"], r["scale"], r["case"]))
+        if o is None or not o["median_s"]: continue
+        ratio = r["median_s"] / o["median_s"]
+        if o["params"] != r["params"]:
+            tag = "(inputs differ)"             # generator changed; not a like-for-like timing
+        else:
+            tag = "SLOWER" if ratio > 1 + tolerance else ("faster" if ratio < 1 - tolerance else "")
+        slower += tag == "SLOWER"
+        print(f"  {r['stage']:<16}{r['scale']:<8}{r['case']:<28}{o['median_s']:>9.4f} -> {r['median_s']:>9.4f} s"
+              f"  x{ratio:.2f} {tag}")
+    return slower
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m benchmarks")
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--scales", default="small")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--compare", default=None)       # earlier results JSON
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    a = ap.parse_args()
+
+    results = []
+    for scale in a.scales.split(","):
+        for stage in a.stages.split(","):
+            print(f"{stage} @ {scale} ...", flush=True)
+            for r in STAGES[stage](scale, SCALES[scale], a.repeat):
+                results.append(to_json(r))
+                print(f"  {r['case']:<28}{r['median_s']:>9.4f} s  {json.dumps(r['params'])}")
+
+    doc = {"meta": meta(), "scales": {s: SCALES[s] for s in a.scales.split(",")}, "results": results}
+    if a.out:
+        with open(a.out, "w") as f: json.dump(doc, f, indent=1)
+        print(f"Saved: {a.out}")
+    if a.compare and compare(results, a.compare, a.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# stages.py
+# One function per pipeline stage: build synthetic inputs for a scale, time the current implementation
+# (and the legacy one where it is still cheap enough to run), return result records.
+
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks import synthetic
+
+# per-scale sizes; "large" is meant for a workstation, not CI
+SCALES = {
+    "small":  {"s2_scenes": 300,    "table_rows": 2_000,   "raster_px": 512,  "evt_groups": 48},
+    "medium": {"s2_scenes": 3_000,  "table_rows": 20_000,  "raster_px": 2048, "evt_groups": 240},
+    "large":  {"s2_scenes": 30_000, "table_rows": 200_000, "raster_px": 6000, "evt_groups": 1200},
+}
+LEGACY_MAX_PAIR_CHECKS = 2_000_000    # legacy O(n_s2 * n_landsat) pairing is skipped above this
+
+
+def timed(fn, repeat):
+    """(min, median) wall seconds over ``repeat`` calls, and the last return value."""
+    times, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = fn(); times.append(time.perf_counter() - t0)
+    return min(times), statistics.median(times), out
+
+def record(stage, scale, case, params, repeat, t, **extra):
+    return {"stage": stage, "scale": scale, "case": case, "params": params, "repeat": repeat,
+            "min_s": t[0], "median_s": t[1], **extra}
+
+
+#  1) Landsat/S2 pairing
+def _legacy_pairs(landsat8, landsat9, copernicus, max_date_diff=7):
+    # the per-mission nested loops getRecent used before scene_pairing
+    cd = [int(img.split('/')[2][0:8]) for img in copernicus]
+    out = []
+    for ids in (landsat8, landsat9):
+        ld = [int(img.split('_')[-1]) for img in ids]
+        for c in cd:
+            c_date = datetime.strptime(str(c), '%Y%m%d').date()
+            for l in ld:
+                l_date = datetime.strptime(str(l), '%Y%m%d').date()
+                if abs((l_date - c_date)).days < max_date_diff or max_date_diff == 0:
+                    out.append((ids[ld.index(l)], copernicus[cd.index(c)]))
+    return out
+
+def bench_pairing(scale, p, repeat):
+    from scene_pairing import pair_scenes
+    l8, l9, s2 = synthetic.scene_ids(p["s2_scenes"])
+    params = {"s2": len(s2), "l8": len(l8), "l9": len(l9)}
+    t = timed(lambda: pair_scenes(l8, l9, s2), repeat)
+    recs = [record("pairing", scale, "sort_merge", params, repeat, t, pairs=len(t[2]))]
+    if len(s2) * (len(l8) + len(l9)) <= LEGACY_MAX_PAIR_CHECKS:
+        tl = timed(lambda: _legacy_pairs(l8, l9, s2), 1)
+        same = [(l, c) for _, l, c in t[2]] == tl[2]
+        recs.append(record("pairing", scale, "legacy_nested_loops", params, 1, tl, pairs=len(tl[2]), identical=same))
+    return recs
+
+
+#  2) Ensemble screening (robust z, weather gap, EVT tail, final score)
+def _screen(df):
+    import zap_Ensemble_model as zap
+    df = zap.sensor_split(df)
+    df["delt_rob"] = df["diff_from_mean"].astype(float)
+    df = zap.robust_baseline(df, col="delt_rob")
+    df = zap.weather_gap(df)
+    df = zap.evt_tail_flag(df, col="delt_rob", p_body=0.95, target_q=0.99)
+    return zap.final_score(df)
+
+def bench_screening(scale, p, repeat):
+    import zap_Ensemble_model as zap
+    zap.EVT_STORE = None                    # fit every run, never write the tail-model CSV
+    df = synthetic.stats_table(p["table_rows"])
+    t = timed(lambda: _screen(df), repeat)
+    flagged = int((t[2]["decision"] == "investigate").sum())
+    return [record("screening", scale, "ensemble_flags", {"rows": len(df)}, repeat, t, investigate=flagged)]
+
+
+#  3) Ensemble scoring (threshold grid backtest + per-scene scorer)
+def bench_scoring(scale, p, repeat):
+    import zap_Ensemble_model as zap
+    from backtest import run_grid
+    from scoring import SceneScorer, build_scoring_tables, save_scoring_tables
+    zap.EVT_STORE = None
+    df = _screen(synthetic.stats_table(p["table_rows"]))
+    grid = dict(z_grid=[2, 2.5, 3, 3.5, 4], zgap_grid=[2, 2.5, 3, 3.5, 4], evt_grid=[(0.9, 0.99), (0.95, 0.99)])
+    t = timed(lambda: run_grid(df, min_scores=(1, 2, 3), **grid), repeat)
+    recs = [record("scoring", scale, "backtest_grid", {"rows": len(df), "configs": 5 * 5 * 2 * 3}, repeat, t)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tables.json")
+        save_scoring_tables(build_scoring_tables(df, zap.Z_THRESHOLD, zap.Z_GAP_THRESHOLD, zap.BASELINE_GROUPS), path)
+        scorer = SceneScorer(path)
+    rows = df[["sensor", "obs_date", "delt_rob", "lst_max", "air_tmax_c_used"]].astype({"obs_date": str}).to_numpy()
+    t = timed(lambda: [scorer.score(*r) for r in rows], repeat)
+    recs.append(record("scoring", scale, "scene_scorer", {"rows": len(rows)}, repeat, t,
+                       scenes_per_s=len(rows) / t[1] if t[1] else None))
+    return recs
+
+
+#  4) Constellr LST statistics
+def _legacy_stats(dn, cloud, nodata):
+    # float32 copy + NaN fill + scaled copy, as the summary job and notebook did before lst_kernel
+    a = dn.astype("float32")
+    a[a == nodata] = np.nan
+    a[cloud != 0] = np.nan
+    c = a * 0.01 - 273.15
+    return {"min": float(np.nanmin(c)), "max": float(np.nanmax(c)), "mean": float(np.nanmean(c)),
+            "p50": float(np.nanpercentile(c, 50)), "p95": float(np.nanpercentile(c, 95))}
+
+def bench_constellr_stats(scale, p, repeat):
+    from lst_kernel import lst_stats
+    dn, cloud = synthetic.lst_scene(p["raster_px"])
+    params = {"px": int(dn.size), "mb": dn.nbytes / 1e6}
+    kw = dict(nodata=synthetic.LST_NODATA, cloud=cloud, scale=0.01, offset=-273.15, qs=(50, 95))
+    t = timed(lambda: lst_stats(dn, **kw), repeat)
+    tl = timed(lambda: _legacy_stats(dn, cloud, synthetic.LST_NODATA), repeat)
+    diff = max(abs(t[2][k] - tl[2][k]) for k in ("min", "max", "mean", "p50", "p95"))
+    recs = [record("constellr_stats", scale, "lst_kernel", params, repeat, t, max_abs_diff_c=diff),
+            record("constellr_stats", scale, "legacy_nan_arrays", params, repeat, tl)]
+
+    if synthetic.RASTER_OK:
+        from raster_stats import p95_minus_median_from_raster
+        with tempfile.TemporaryDirectory() as tmp:
+            lst = synthetic.write_geotiff(os.path.join(tmp, "Z_lst.tiff"), dn, synthetic.LST_NODATA)
+            cm = synthetic.write_geotiff(os.path.join(tmp, "Z_cloud_mask.tiff"), cloud)
+            t = timed(lambda: p95_minus_median_from_raster(lst, cm), repeat)
+        recs.append(record("constellr_stats", scale, "geotiff_p95_minus_median", params, repeat, t))
+    return recs
+
+
+#  5) EVT tail fits
+def bench_evt(scale, p, repeat):
+    import bench_gpd_fit
+    res = bench_gpd_fit.run(p["evt_groups"], 1000)
+    params = {"groups": res["groups"], "n_per_group": res["n_per_group"]}
+    recs = [record("evt_fit", scale, "per_group_mle", params, 1, (res["mle_loop_s"],) * 2)]
+    for m in ("pwm", "pwm+mle"):
+        r = res[m]
+        recs.append(record("evt_fit", scale, m, params, 1, (r["seconds"],) * 2,
+                           max_abs_diff_q=r["max_abs_diff_q"]))
+    return recs
+
+
+STAGES = {
+    "pairing": bench_pairing,
+    "screening": bench_screening,
+    "scoring": bench_scoring,
+    "constellr_stats": bench_constellr_stats,
+    "evt_fit": bench_evt,
+}
+
+def to_json(obj):
+    return json.loads(json.dumps(obj, default=lambda o: o.item() if hasattr(o, "item") else str(o)))
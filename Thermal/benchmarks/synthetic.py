@@ -0,0 +1,80 @@
+# synthetic.py
+# Synthetic inputs shaped like the real ones: GEE scene id lists, Constellr LST/QA rasters and
+# multi-year per-scene stats tables. Everything is seeded, so runs at the same scale are comparable.
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+try:
+    import rasterio
+    RASTER_OK = True
+except Exception:
+    RASTER_OK = False
+
+LST_NODATA = 0          # Constellr DN nodata; DN * 0.01 = K
+SENSORS = ("landsat", "downscaled", "constellr")
+BASELINE_GROUPS = {"landsat": "landsat", "downscaled": "hires", "constellr": "hires"}
+
+
+def scene_ids(n_s2, start=date(2015, 1, 1), seed=0):
+    """(landsat8, landsat9, s2) id lists: S2 every 2-5 days (sometimes two tiles), L8/L9 every 16 days 8 apart."""
+    rs = np.random.default_rng(seed)
+    s2, d = [], start
+    while len(s2) < n_s2:
+        for tile in ("T36TXT", "T36TXS")[:1 + (rs.random() < 0.2)]:
+            s2.append(f"COPERNICUS/S2_SR_HARMONIZED/{d:%Y%m%d}T083609_{d:%Y%m%d}T083658_{tile}")
+        d += timedelta(days=int(rs.choice([2, 3, 5])))
+    s2 = s2[:n_s2]
+    end = d
+    l8 = [f"LANDSAT/LC08/C02/T1_L2/LC08_181027_{start + timedelta(days=i):%Y%m%d}"
+          for i in range(0, (end - start).days, 16)]
+    l9 = [f"LANDSAT/LC09/C02/T1_L2/LC09_181027_{start + timedelta(days=i):%Y%m%d}"
+          for i in range(8, (end - start).days, 16)]
+    return l8, l9, s2
+
+def lst_scene(size, seed=0, cloud_frac=0.2, nodata_frac=0.05):
+    """(uint16 LST DN, uint8 cloud mask) of ``size`` x ``size``: smooth field + noise + a warm plume."""
+    rs = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    k = 295.0 + 8.0 * x + 4.0 * np.sin(6 * y)                               # K
+    k += 12.0 * np.exp(-(((x - 0.6) ** 2 + (y - 0.4) ** 2) / 0.002))         # plume
+    k += rs.normal(0, 0.8, (size, size)).astype(np.float32)
+    dn = np.clip(k * 100.0, 1, 65535).astype(np.uint16)
+    dn[:, :int(size * nodata_frac)] = LST_NODATA                              # swath edge
+    # clouds as a thresholded low-frequency field, so they come in blobs
+    c = rs.normal(size=(max(size // 32, 2),) * 2)
+    c = np.kron(c, np.ones((32, 32)))[:size, :size] if size >= 32 else rs.normal(size=(size, size))
+    cloud = (c > np.quantile(c, 1 - cloud_frac)).astype(np.uint8)
+    return dn, cloud
+
+def write_geotiff(path, arr, nodata=None, tiled=True):
+    """Single-band GeoTIFF (256 px tiles); needs rasterio."""
+    prof = dict(driver="GTiff", width=arr.shape[1], height=arr.shape[0], count=1, dtype=arr.dtype.name,
+                nodata=nodata, tiled=tiled, blockxsize=256, blockysize=256)
+    with rasterio.open(path, "w", **prof) as dst:
+        dst.write(arr, 1)
+    return path
+
+def stats_table(n_rows, start_year=2015, seed=0):
+    """Multi-year per-scene table in the unified ensemble layout (after load_and_unify + attach_weather)."""
+    rs = np.random.default_rng(seed)
+    sensor = rs.choice(SENSORS, n_rows, p=[0.3, 0.5, 0.2])
+    end_year = max(2025, start_year + n_rows // 400)                          # always reaches the eval window
+    span = (pd.Timestamp(f"{end_year}-12-31") - pd.Timestamp(f"{start_year}-01-01")).days
+    obs = pd.Timestamp(f"{start_year}-01-01") + pd.to_timedelta(rs.integers(0, span, n_rows), unit="D")
+    month = obs.month.to_numpy()
+    season = 10.0 * np.sin((month - 4) / 12.0 * 2 * np.pi)
+    air = 15.0 + season + rs.normal(0, 3, n_rows)
+    lst_max = air + 8.0 + rs.gamma(2.0, 2.0, n_rows)
+    delt = rs.lognormal(1.2, 0.5, n_rows)
+    hot = rs.random(n_rows) < 0.01                                             # injected anomalies
+    delt[hot] *= 3.0; lst_max[hot] += 10.0
+    df = pd.DataFrame({
+        "date": obs, "date_s2": obs, "obs_date": obs, "sensor": sensor, "month": month,
+        "lst_max": lst_max, "lst_mean": lst_max - 6.0, "lst_min": lst_max - 12.0,
+        "diff_from_mean": delt, "air_tmax_c": air, "air_tmax_c_s2": air, "air_tmax_c_used": air,
+    })
+    df["baseline_group"] = df["sensor"].map(BASELINE_GROUPS)
+    return df.sort_values("obs_date", kind="mergesort").reset_index(drop=True)
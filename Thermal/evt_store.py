@@ -0,0 +1,67 @@
+# evt_store.py
+# Persisted GPD tail models per (baseline_group, month).
+# A group is refitted only when the fingerprint of its training values (or p_body/target_q/method) changes;
+# all stale groups are refitted together through gpd_batch.fit_tails.
+
+import hashlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from gpd_batch import fit_tails
+
+STORE_COLS = ["baseline_group", "month", "fingerprint", "method", "p_body", "target_q",
+              "u_thr", "shape", "scale", "n_exc", "evt_q"]
+
+
+def fingerprint(x, p_body, target_q, method="pwm"):
+    # order-independent hash of the training values + fit settings
+    v = np.sort(np.asarray(x, dtype="float64"))
+    h = hashlib.sha1(v.tobytes())
+    h.update(f"{p_body:.6f}|{target_q:.6f}|{method}".encode())
+    return h.hexdigest()
+
+
+class TailModelStore:
+    """CSV-backed table of fitted tails, keyed by (baseline_group, month)."""
+
+    def __init__(self, path):
+        self.path = Path(path) if path else None
+        self.models = {}
+        if self.path and self.path.exists():
+            tab = pd.read_csv(self.path)
+            for r in tab.to_dict("records"):
+                self.models[(r["baseline_group"], float(r["month"]))] = r
+        self.refitted = 0
+
+    def get(self, grp, month, fp):
+        r = self.models.get((grp, float(month)))
+        return r if r is not None and r["fingerprint"] == fp else None
+
+    def put(self, grp, month, rec):
+        self.models[(grp, float(month))] = {"baseline_group": grp, "month": float(month), **rec}
+        self.refitted += 1
+
+    def table(self):
+        return pd.DataFrame(list(self.models.values()), columns=STORE_COLS)
+
+    def save(self):
+        if self.path: self.table().to_csv(self.path, index=False)
+
+
+def tail_quantiles(train, col, store, p_body=0.95, target_q=0.99,
+                   keys=("baseline_group","month"), method="pwm"):
+    """Per-group u_thr and ``<col>_evt_q``, reusing stored fits whose training data is unchanged."""
+    keys = list(keys)
+    groups = {k: g[col].dropna().to_numpy(dtype="float64") for k, g in train.groupby(keys)}
+    fps = {k: fingerprint(x, p_body, target_q, method) for k, x in groups.items()}
+    stale = [k for k in groups if store.get(*k, fps[k]) is None]
+    for k, rec in zip(stale, fit_tails([groups[k] for k in stale], p_body, target_q, method)):
+        store.put(*k, {"fingerprint": fps[k], "method": method,
+                       "p_body": p_body, "target_q": target_q, **rec})
+    if store.refitted: store.save()
+    rows = []
+    for (grp, month), fp in fps.items():
+        r = store.get(grp, month, fp)
+        rows.append({keys[0]: grp, keys[1]: month, "u_thr": r["u_thr"], f"{col}_evt_q": r["evt_q"]})
+    return pd.DataFrame(rows, columns=[*keys, "u_thr", f"{col}_evt_q"])
@@ -21,7 +21,12 @@ def main():
     with open('saved_inputs.pkl', 'rb') as f:
         suitablel8_images, suitablel9_images, suitableS2_images, extent_data = pickle.load(f)
         extent = ee.Geometry(extent_data)
-    l9_list, l8_list, c8_list, c9_list = getRecent(suitablel8_images, suitablel9_images, suitableS2_images)
+    # one sensor-tagged pairing pass over L8 + L9
+    pairs = pair_scenes(suitablel8_images, suitablel9_images, suitableS2_images)
+    l8_list = [l for s, l, _ in pairs if s == 'L8']
+    c8_list = [c for s, _, c in pairs if s == 'L8']
+    l9_list = [l for s, l, _ in pairs if s == 'L9']
+    c9_list = [c for s, _, c in pairs if s == 'L9']
     print(l8_list)
     print("                        ")
     print(c8_list)
@@ -30,7 +35,7 @@ def main():
     print("                        ")
     print(c9_list)
 
-    if len(l8_list) == 0 and len(l9_list) == 0:
+    if not pairs:
 
         print("No Landsat matches. Proceeding with Sentinel-2 only fallback.")
         sentinel_only_temperature_stats(suitableS2_images, extent)
@@ -41,51 +46,31 @@ def main():
         return x.getInfo() if hasattr(x, 'getInfo') else x
     
 
-    #l_collection_recentimg,  s2_collection_recentimg, recent_pair_l, suitable_pairs, 
-    stats8_downscale = np.array([]) # [Landsat 8 acquisition date, Sentinel 2 acquisition date, Max Temp, Min Temp, Mean Temp]
-    stats8_normal = np.array([]) # [Landsat 8 acquisition date, Sentinel 2 acquisition date, Max Temp, Min Temp, Mean Temp]
-    for i in range(len(l8_list)):
-        stat_values, more_values = model(l8_list[i], c8_list[i], extent)
-        print(stat_values)
-        print(more_values)
+    # one model queue for both missions; results are split per sensor only for the CSVs
+    results = run_model_queue(pairs, model, extent)
+    stats8_downscale, stats8_normal = (np.array(r) for r in results.get('L8', ([], [])))
+    stats9_downscale, stats9_normal = (np.array(r) for r in results.get('L9', ([], [])))
+    n8, n9 = len(stats8_downscale), len(stats9_downscale)
+    for sensor in ('L8', 'L9'):
+        for stat_values, more_values in zip(*results.get(sensor, ([], []))):
+            print(stat_values)
+            print(more_values)
 
-        # stat_values = [to_float(v) for v in stat_values]
-        # more_values = [to_float(v) for v in more_values]
-
-
-        stats8_downscale = np.append(stats8_downscale, stat_values)
-        stats8_normal = np.append(stats8_normal, more_values)
-        
-    
     #export stats to csv
-    stats = stats8_downscale.reshape(len(l8_list), 5)
+    stats = stats8_downscale.reshape(n8, 5)
     df = pd.DataFrame(stats, columns = ['Landsat 8 acquisition date', 'Sentinel 2 acquisition date', 'Max Temp', 'Min Temp', 'Mean Temp'])
     df.to_csv('stats8_downscale_2015.csv', index=False)
 
-    stats = stats8_normal.reshape(len(l8_list), 5)
+    stats = stats8_normal.reshape(n8, 5)
     df = pd.DataFrame(stats, columns = ['Landsat 8 acquisition date', 'Sentinel 2 acquisition date', 'Max Temp', 'Min Temp', 'Mean Temp'])
     df.to_csv('stats8_normal_2015.csv', index=False)
 
-    stats9_downscale = np.array([]) # [Landsat 8 acquisition date, Sentinel 2 acquisition date, Max Temp, Min Temp, Mean Temp]
-    stats9_normal = np.array([]) # [Landsat 8 acquisition date, Sentinel 2 acquisition date, Max Temp, Min Temp, Mean Temp]
-    for i in range(len(l9_list)):
-        stat_values, more_values = model(l9_list[i], c9_list[i], extent)
-        print(stat_values)
-        print(more_values)
-        # stat_values = [to_float(v) for v in stat_values]
-        # more_values = [to_float(v) for v in more_values]
-
-
-        stats9_downscale = np.append(stats9_downscale, stat_values)
-        stats9_normal = np.append(stats9_normal, more_values)
-        
-    
     #export stats to csv
-    stats = stats9_downscale.reshape(len(l9_list), 5)
+    stats = stats9_downscale.reshape(n9, 5)
     df = pd.DataFrame(stats, columns = ['Landsat 9 acquisition date', 'Sentinel 2 acquisition date', 'Max Temp', 'Min Temp', 'Mean Temp'])
     df.to_csv('stats9_downscale_2015.csv', index=False)
 
-    stats = stats9_normal.reshape(len(l9_list), 5)
+    stats = stats9_normal.reshape(n9, 5)
     df = pd.DataFrame(stats, columns = ['Landsat 9 acquisition date', 'Sentinel 2 acquisition date', 'Max Temp', 'Min Temp', 'Mean Temp'])
     df.to_csv('stats9_normal_2015.csv', index=False)
 
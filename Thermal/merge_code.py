@@ -1,5 +1,10 @@
 import pandas as pd
 
+from asof_align import align_asof
+
+# scenes up to this many days apart are treated as the same observation event
+TOLERANCE_DAYS = 1
+
 # Load previously prepared datasets
 landsat = pd.read_csv("D:/Dissertation-2542000/RP3/Thermal/Notebooks/stats_normal_2015_merged.csv")
 downscaled = pd.read_csv("D:/Dissertation-2542000/RP3/Thermal/Notebooks/stats_downscale_2023_merged.csv")
@@ -33,11 +38,9 @@ downscaled_subset = downscaled[['Date', 'DeltaT_GEE','L8_Date_for_S2', 'S2_L8_da
 constellr_subset = constellr[['Date', 'DeltaT_Constellr']]
 fusion_subset = fusion[['Date', 'DeltaT_Fusion']]  #
 
-# Merge all datasets
-df = pd.merge(landsat_subset, downscaled_subset, on='Date', how='outer')
-df = pd.merge(df, constellr_subset, on='Date', how='outer')
-df = pd.merge(df, fusion_subset, on='Date', how='outer')  # 
-df = df.sort_values(by='Date').reset_index(drop=True)
+# Align all datasets (nearest scene within TOLERANCE_DAYS; the S2 date anchors each event)
+df = align_asof({'GEE': downscaled_subset, 'Constellr': constellr_subset,
+                 'Fusion': fusion_subset, 'Landsat': landsat_subset}, tolerance_days=TOLERANCE_DAYS)
 
 desired_order = [
     'Date',
@@ -47,7 +50,11 @@ desired_order = [
     'L8_Date_for_S2', 
     'S2_L8_days_diff',
     'Landsat Image ID',
-    'Sentinel Image ID'
+    'Sentinel Image ID',
+    'GEE_gap_days',
+    'Constellr_gap_days',
+    'Fusion_gap_days',
+    'Landsat_gap_days'
 ]
 
 # Keep only those that actually exist in df (prevents KeyError if missing)
@@ -0,0 +1,86 @@
+# raster_index.py
+# One-time index of the Constellr DD-MM-YYYY date folders -> (lst, cloud_mask) paths.
+# The base directory is listed once per refresh; only new or modified folders are rescanned,
+# and the result is persisted as a JSON manifest so later runs start from it.
+
+import json
+import os
+from datetime import date, datetime
+from fnmatch import fnmatch
+from pathlib import Path
+
+# same patterns and priority as the old per-date glob lookups
+LST_PATTERNS   = ["*lst.tif", "*lst.tiff", "*_lst.tif*"]
+CLOUD_PATTERNS = ["*cloud_mask.tif", "*cloud_mask.tiff", "*cloud_mask*.tif*",
+                  "*cloud_mask.png", "*cloud_mask.jpg", "*cloud_mask.jpeg"]
+
+
+def parse_folder_date(name):
+    try: return datetime.strptime(name, "%d-%m-%Y").date()
+    except ValueError: return None
+
+def _first_match(names, patterns):
+    for p in patterns:
+        hits = [n for n in names if fnmatch(n, p)]
+        if hits: return sorted(hits)[0]
+    return None
+
+def classify_folder(folder):
+    names = sorted(e.name for e in os.scandir(folder) if e.is_file() and not e.name.startswith("."))
+    lst, cloud = _first_match(names, LST_PATTERNS), _first_match(names, CLOUD_PATTERNS)
+    return (str(Path(folder) / lst) if lst else None,
+            str(Path(folder) / cloud) if cloud else None)
+
+
+class ConstellrRasterIndex:
+    """Date -> (lst_path, cloudmask_path) lookups for a Constellr base directory."""
+
+    def __init__(self, base_dir, manifest=None, refresh=True):
+        self.base_dir = str(base_dir)
+        self.manifest = Path(manifest) if manifest else None
+        self.folders = {}      # folder name -> {"mtime_ns", "lst", "cloud"}
+        self.by_date = {}
+        if self.manifest and self.manifest.exists():
+            m = json.loads(self.manifest.read_text())
+            if m.get("base_dir") == self.base_dir: self.folders = m["folders"]
+        if refresh: self.refresh()
+        else: self._rebuild()
+
+    def _rebuild(self):
+        self.by_date = {}
+        for name, f in self.folders.items():
+            d = parse_folder_date(name)
+            if d is not None: self.by_date[d] = (f["lst"], f["cloud"])
+
+    def refresh(self):
+        """Rescan only folders that are new or whose mtime changed; drop vanished ones."""
+        if not os.path.isdir(self.base_dir):
+            self.folders, self.by_date = {}, {}
+            return 0
+        seen, changed = set(), 0
+        for e in os.scandir(self.base_dir):
+            if not e.is_dir() or parse_folder_date(e.name) is None: continue
+            seen.add(e.name)
+            mt = e.stat().st_mtime_ns
+            old = self.folders.get(e.name)
+            if old is None or old["mtime_ns"] != mt:
+                lst, cloud = classify_folder(e.path)
+                self.folders[e.name] = {"mtime_ns": mt, "lst": lst, "cloud": cloud}
+                changed += 1
+        for name in set(self.folders) - seen:
+            del self.folders[name]; changed += 1
+        self._rebuild()
+        if changed: self.save()
+        return changed
+
+    def save(self):
+        if self.manifest:
+            self.manifest.write_text(json.dumps({"base_dir": self.base_dir, "folders": self.folders}, indent=1))
+
+    def lookup(self, obs_date):
+        try:
+            d = obs_date if type(obs_date) is date else (
+                obs_date.date() if isinstance(obs_date, datetime) else datetime.fromisoformat(str(obs_date)).date())
+        except (TypeError, ValueError):
+            return (None, None)
+        return self.by_date.get(d, (None, None))
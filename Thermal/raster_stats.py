@@ -0,0 +1,81 @@
+# raster_stats.py
+# Windowed raster reads + scene ΔT metrics (P95 − median) for the ensemble scripts.
+# Scenes are fanned out to a process pool; each scene is read block by block and
+# summarised by the lst_kernel accumulator, so memory does not grow with scene size.
+
+import os
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from lst_kernel import LstStats
+
+# Optional rasters
+try:
+    import rasterio
+    RASTER_OK = True
+except Exception:
+    RASTER_OK = False
+
+
+def iter_blocks(src, band=1):
+    # native block windows of the band (tiles or strips)
+    for _, win in src.block_windows(band):
+        yield win, src.read(band, window=win)
+
+def _open_mask(cloudmask_path, src):
+    # cloud mask is only usable when it lines up with the LST grid
+    if not cloudmask_path or not Path(cloudmask_path).exists(): return None
+    try:
+        m = rasterio.open(cloudmask_path)
+    except Exception:
+        return None
+    if (m.width, m.height) != (src.width, src.height):
+        m.close(); return None
+    return m
+
+def _iter_raw(lst_path, cloudmask_path=None):
+    # yields (raw block, cloud block or None) per native window; masking happens in the kernel
+    with rasterio.open(lst_path) as src:
+        m = _open_mask(cloudmask_path, src)
+        try:
+            for win, a in iter_blocks(src):
+                yield a, (m.read(1, window=win) if m is not None else None)
+        finally:
+            if m is not None: m.close()
+
+def scene_summary(lst_path, cloudmask_path=None, nodata=None, qs=(50, 95),
+                  value_range=None, refine=True, scale=1.0, offset=0.0):
+    """Count/min/max/mean/std and percentiles of a scene's valid pixels in bounded memory."""
+    if nodata is None:
+        with rasterio.open(lst_path) as src: nodata = src.nodata
+    k = LstStats(nodata, scale, offset, qs, value_range)
+    for a, c in _iter_raw(lst_path, cloudmask_path): k.update(a, c)
+    if k.n == 0: return None
+    if refine and k.needs_refine():
+        k.start_refine()
+        for a, c in _iter_raw(lst_path, cloudmask_path): k.update_refine(a, c)
+    return k.result()
+
+def p95_minus_median_from_raster(lst_path, cloudmask_path=None, nodata=None):
+    if not RASTER_OK or not lst_path or not Path(lst_path).exists(): return np.nan
+    s = scene_summary(lst_path, cloudmask_path, nodata, qs=(50, 95))
+    if s is None: return np.nan
+    return s["p95"] - s["p50"]
+
+def _scene_job(args):
+    lst_path, cloudmask_path, nodata = args
+    try:
+        return p95_minus_median_from_raster(lst_path, cloudmask_path, nodata)
+    except Exception:
+        return np.nan
+
+def scene_metrics_parallel(pairs, nodata=None, max_workers=None):
+    """ΔTrob for a list of (lst_path, cloudmask_path) pairs; NaN where a scene is unusable."""
+    jobs = [(lst, cloud, nodata) for lst, cloud in pairs]
+    if not jobs: return []
+    workers = max_workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) == 1:
+        return [_scene_job(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+        return list(ex.map(_scene_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
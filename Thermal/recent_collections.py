@@ -3,65 +3,16 @@ from landsat_clouds import *
 import ee
 import numpy as np
 from datetime import datetime
+from scene_pairing import MAX_DATE_DIFF, MODEL_WORKERS, pair_scenes, run_model_queue
 import pandas as pd
 ee.Initialize(project='high-keel-462317-i5')
 
 def getRecent(landsat8, landsat9, copernicus):
-    landsat8_dates = [int(img.split('_')[-1]) for img in landsat8]
-    landsat9_dates = [int(img.split('_')[-1]) for img in landsat9]
-    copernicus_dates = [int(img.split('/')[2][0:8]) for img in copernicus]
-    max_date_diff = 7
-    
-
-    suitablel8_pairs = []
-    suitablel8_dates = []
-    for c_date in copernicus_dates:
-        c_date = datetime.strptime(str(c_date), '%Y%m%d').date()
-        
-        for l8_date in landsat8_dates:
-            l8_date = datetime.strptime(str(l8_date), '%Y%m%d').date()
- 
-            date_diff = abs((l8_date - c_date)).days
-
-            
-            if date_diff < max_date_diff or max_date_diff == 0:
-                land8_date = l8_date.strftime('%Y%m%d')
-                cop_date = c_date.strftime('%Y%m%d')
-
-                # find the index of l_date and c_date in landsat_dates and copernicus_dates
-                l8_index = landsat8_dates.index(int(land8_date))
-                c8_index = copernicus_dates.index(int(cop_date))
-                
-                # push the corresponding landsat and copernicus images to suitable_pairs
-                suitablel8_pairs.append([landsat8[l8_index], copernicus[c8_index]])
-                suitablel8_dates.append([l8_date, cop_date])
-
-    suitablel9_pairs = []
-    suitablel9_dates = []
-    for c_date in copernicus_dates:
-        c_date = datetime.strptime(str(c_date), '%Y%m%d').date()
-
-        for l9_date in landsat9_dates: 
-            l9_date = datetime.strptime(str(l9_date), '%Y%m%d').date()
-            date_diff = abs((l9_date - c_date)).days
-
-            
-            if date_diff < max_date_diff or max_date_diff == 0:
-                land9_date = l9_date.strftime('%Y%m%d')
-                cop_date = c_date.strftime('%Y%m%d')
-
-                # find the index of l_date and c_date in landsat_dates and copernicus_dates
-                l9_index = landsat9_dates.index(int(land9_date))
-                c9_index = copernicus_dates.index(int(cop_date))
-                #print(l9_index, c_index)
-                # push the corresponding landsat and copernicus images to suitable_pairs
-                suitablel9_pairs.append([landsat9[l9_index], copernicus[c9_index]])
-                suitablel9_dates.append([l9_date, cop_date])
-
-    l8_list = [pair[0] for pair in suitablel8_pairs]
-    c8_list = [pair[1] for pair in suitablel8_pairs]
-    l9_list = [pair[0] for pair in suitablel9_pairs]
-    c9_list = [pair[1] for pair in suitablel9_pairs]
+    pairs = pair_scenes(landsat8, landsat9, copernicus)
+    l8_list = [l for s, l, _ in pairs if s == 'L8']
+    c8_list = [c for s, _, c in pairs if s == 'L8']
+    l9_list = [l for s, l, _ in pairs if s == 'L9']
+    c9_list = [c for s, _, c in pairs if s == 'L9']
 
     print(l8_list)
     print("                        ")
@@ -73,21 +24,34 @@ def getRecent(landsat8, landsat9, copernicus):
 
     return l9_list, l8_list, c8_list, c9_list
 
+# S2 ids per getInfo in the fallback; keeps each request well inside EE's payload/compute limits
+FALLBACK_CHUNK = 100
 
+def sentinel_only_temperature_stats(s2_image_ids, extent, filename='Iran_S2_only_stats.csv', chunk=FALLBACK_CHUNK):
+    reducer = ee.Reducer.minMax().combine(ee.Reducer.mean(), '', True)
 
-def sentinel_only_temperature_stats(s2_image_ids, extent, filename='Iran_S2_only_stats.csv'):
-    stats_s2_only = []
-    for img_id in s2_image_ids:
-        img = ee.Image(img_id).clip(extent)
-        band = img.select('B11')
-
-        stats = band.reduceRegion(
-            reducer=ee.Reducer.minMax().combine(ee.Reducer.mean(), '', True),
+    def scene_stats(img):
+        # B11 min/max/mean over the extent as a geometry-less feature tagged with the image id
+        stats = img.clip(extent).select('B11').reduceRegion(
+            reducer=reducer,
             geometry=extent,
             scale=10,
             maxPixels=1e9
-        ).getInfo()
+        )
+        return ee.Feature(None, stats).set('img_id', img.get('system:id'))
+
+    # one server-side map + getInfo per chunk instead of one reduceRegion round trip per scene
+    by_id = {}
+    for i in range(0, len(s2_image_ids), chunk):
+        ids = s2_image_ids[i:i + chunk]
+        fc = ee.ImageCollection([ee.Image(img_id) for img_id in ids]).map(scene_stats)
+        for f in fc.getInfo()['features']:
+            p = f['properties']
+            by_id[p.get('img_id')] = p
 
+    stats_s2_only = []
+    for img_id in s2_image_ids:
+        stats = by_id.get(img_id, {})
         acquisition_date = img_id.split('/')[-1][:8]
         stats_s2_only.append([
             acquisition_date,
@@ -97,8 +61,10 @@ def sentinel_only_temperature_stats(s2_image_ids, extent, filename='Iran_S2_only
         ])
 
     df = pd.DataFrame(stats_s2_only, columns=['Sentinel 2 acquisition date', 'Max Temp (SWIR)', 'Min Temp (SWIR)', 'Mean Temp (SWIR)'])
-    df.to_csv(filename, index=False)
-    print(f" Saved fallback stats to {filename}")
+    if filename:
+        df.to_csv(filename, index=False)
+        print(f" Saved fallback stats to {filename}")
+    return df
 
     #print('L8: ',suitablel8_dates)
     #print('L9: ',suitablel9_dates)
@@ -0,0 +1,149 @@
+# scoring.py
+# Single-scene scoring against the baselines/EVT tables exported by the ensemble scripts.
+# Tables are loaded once into a dict keyed by (baseline_group, month); scoring a scene is plain arithmetic.
+#
+#   python scoring.py --tables ./zap_scoring_tables.json score --sensor constellr --date 2025-07-14 --delt_rob 9.1 --lst_max 41.2 --air 30.5
+#   python scoring.py --tables ./zap_scoring_tables.json stdin        # JSON lines in -> JSON lines out
+#   python scoring.py --tables ./zap_scoring_tables.json serve --port 8765   # GET /score?sensor=..&date=..&delt_rob=..
+
+import argparse, json, math, sys
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+MAD_SCALE = 1.4826
+TABLE_COLS = {
+    "delt_rob_median_train": "med", "delt_rob_mad_train": "mad",
+    "gap_med_train": "gap_med", "gap_mad_train": "gap_mad",
+    "delt_rob_evt_q": "evt_q",
+}
+NAN = float("nan")
+
+
+def build_scoring_tables(df, z_threshold, z_gap_threshold, baseline_groups):
+    """Per-(baseline_group, month) medians/MADs/EVT levels from a scored ensemble frame."""
+    cols = [c for c in TABLE_COLS if c in df.columns]
+    tab = (df.dropna(subset=["month"])
+             .groupby(["baseline_group", "month"])[cols].first()
+             .reset_index())
+    rows = []
+    for r in tab.to_dict("records"):
+        rows.append({"baseline_group": r["baseline_group"], "month": int(r["month"]),
+                     **{TABLE_COLS[c]: _json_num(r[c]) for c in cols}})
+    return {"z_threshold": z_threshold, "z_gap_threshold": z_gap_threshold,
+            "baseline_groups": dict(baseline_groups), "rows": rows}
+
+def _json_num(x):
+    # missing baselines are written as null, not the non-standard NaN token
+    x = float(x)
+    return None if math.isnan(x) else x
+
+def save_scoring_tables(tables, path):
+    with open(path, "w") as f: json.dump(tables, f, indent=1, allow_nan=False)
+
+
+def _month(d):
+    if isinstance(d, (date, datetime)): return d.month
+    s = str(d)
+    if len(s) >= 7 and s[4] == "-" and s[5:7].isdigit() and (len(s) == 7 or not s[7].isdigit()):
+        return int(s[5:7])                                  # YYYY-MM[-DD] fast path
+    import pandas as pd                                     # "2025-7-14", "14/07/2025", ...
+    return pd.to_datetime(s).month
+
+def _f(x):
+    return NAN if x is None or x == "" else float(x)
+
+
+class SceneScorer:
+    """Scores one scene against stored tables; see ``score``."""
+
+    def __init__(self, path):
+        with open(path) as f: t = json.load(f)
+        self.z_thr = float(t["z_threshold"])
+        self.z_gap_thr = float(t["z_gap_threshold"])
+        self.groups = t["baseline_groups"]
+        self.rows = {}
+        for r in t["rows"]:
+            self.rows[(r["baseline_group"], int(r["month"]))] = tuple(
+                _f(r.get(k)) for k in ("med", "mad", "gap_med", "gap_mad", "evt_q"))
+
+    def score(self, sensor, obs_date, delt_rob, lst_max=None, air_tmax_c=None):
+        grp = self.groups.get(sensor, sensor)
+        med, mad, gmed, gmad, evt_q = self.rows.get((grp, _month(obs_date)), (NAN,)*5)
+        x = _f(delt_rob)
+        z = (x - med) / (MAD_SCALE * (mad + 1e-9))
+        gap = _f(lst_max) - _f(air_tmax_c)
+        z_gap = (gap - gmed) / (MAD_SCALE * (gmad + 1e-9))
+        # NaN comparisons are False, as in the ensemble frame
+        robust = z >= self.z_thr
+        weather = z_gap >= self.z_gap_thr
+        evt = x > evt_q
+        s = robust + weather + evt
+        return {
+            "baseline_group": grp,
+            "z_delt_rob": None if math.isnan(z) else z,
+            "z_gap": None if math.isnan(z_gap) else z_gap,
+            "robust_z_flag": robust,
+            "weather_norm_flag": weather,
+            "evt_tail_flag": evt,
+            "anomaly_score": s,
+            "decision": "investigate" if s >= 2 else ("low_interest" if s == 1 else "ignore"),
+        }
+
+    def score_record(self, r):
+        return self.score(r.get("sensor", "constellr"), r.get("date") or r.get("obs_date"),
+                          r.get("delt_rob"), r.get("lst_max"), r.get("air_tmax_c"))
+
+
+def _serve(scorer, host, port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            u = urlparse(self.path)
+            if u.path != "/score":
+                self.send_error(404); return
+            try:
+                q = {k: v[0] for k, v in parse_qs(u.query).items()}
+                body = json.dumps(scorer.score_record(q)).encode()
+                self.send_response(200)
+            except Exception as e:
+                body = json.dumps({"error": str(e)}).encode()
+                self.send_response(400)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *a):
+            pass
+
+    print(f"Scoring on http://{host}:{port}/score")
+    ThreadingHTTPServer((host, port), Handler).serve_forever()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tables", required=True)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    one = sub.add_parser("score")
+    one.add_argument("--sensor", default="constellr")
+    one.add_argument("--date", required=True)
+    one.add_argument("--delt_rob", type=float, required=True)
+    one.add_argument("--lst_max", type=float, default=None)
+    one.add_argument("--air", type=float, default=None)
+    sub.add_parser("stdin")
+    srv = sub.add_parser("serve")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    a = ap.parse_args()
+
+    scorer = SceneScorer(a.tables)
+    if a.cmd == "score":
+        print(json.dumps(scorer.score(a.sensor, a.date, a.delt_rob, a.lst_max, a.air)))
+    elif a.cmd == "stdin":
+        for line in sys.stdin:
+            if line.strip():
+                print(json.dumps(scorer.score_record(json.loads(line))), flush=True)
+    else:
+        _serve(scorer, a.host, a.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# table_cache.py
+# Excel/CSV inputs converted once to typed, uncompressed Feather (Arrow IPC) files.
+# Cache files are keyed by source path + mtime + size and read back memory-mapped; the conversion to
+# pandas still copies the columns, the saving is the skipped Excel parse and date parsing.
+
+import hashlib
+import os
+import pandas as pd
+from pathlib import Path
+
+# Optional Arrow
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    ARROW_OK = True
+except Exception:
+    ARROW_OK = False
+
+CACHE_DIR = ".table_cache"
+
+
+def normalise_columns(df, rename_map=None):
+    df.columns = [str(c).strip().lower().replace(" ","_") for c in df.columns]
+    if rename_map:
+        df = df.rename(columns={k:v for k,v in rename_map.items() if k in df.columns})
+    return df
+
+def _parse_dates(df, date_cols=()):
+    # typed datetime columns (only the ones named) so later runs skip string parsing
+    for c in date_cols:
+        if c in df.columns and not (pd.api.types.is_datetime64_any_dtype(df[c]) or pd.api.types.is_numeric_dtype(df[c])):
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+    return df
+
+def _read_source(path):
+    return pd.read_csv(path) if str(path).lower().endswith(".csv") else pd.read_excel(path)
+
+def _cache_path(path, cache_dir, rename_map=None, date_cols=()):
+    # <stem>-<path hash>-<mtime>-<size>-<rename map/date cols hash>.feather ; the glob matches older versions
+    p = Path(path).resolve()
+    st = p.stat()
+    tag = hashlib.sha1(str(p).encode()).hexdigest()[:10]
+    rmap = hashlib.sha1(repr((sorted((rename_map or {}).items()), sorted(date_cols))).encode()).hexdigest()[:8]
+    return (Path(cache_dir) / f"{p.stem}-{tag}-{st.st_mtime_ns}-{st.st_size}-{rmap}.feather",
+            f"{p.stem}-{tag}-*.feather")
+
+def read_table_cached(path, rename_map=None, cache_dir=CACHE_DIR, date_cols=()):
+    """Normalised (lower_snake columns, ``rename_map`` applied, ``date_cols`` parsed) table for ``path``.
+
+    A cache hit maps the Feather file and converts it to pandas, which copies the data."""
+    if not ARROW_OK:
+        return _parse_dates(normalise_columns(_read_source(path), rename_map), date_cols)
+
+    cpath, pattern = _cache_path(path, cache_dir, rename_map, date_cols)
+    if cpath.exists():
+        return feather.read_table(cpath, memory_map=True).to_pandas(split_blocks=True)
+
+    df = _parse_dates(normalise_columns(_read_source(path), rename_map), date_cols)
+    try:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        for old in Path(cache_dir).glob(pattern): old.unlink()
+        tmp = cpath.with_suffix(".tmp")
+        feather.write_feather(df, tmp, compression="uncompressed")
+        os.replace(tmp, cpath)
+    except (pa.ArrowException, OSError) as e:
+        # mixed-type object columns etc. -> just use the parsed frame
+        print(f"table cache skipped for {path}: {e}")
+    return df